@@ -3,9 +3,15 @@ from .bots import *
 from .tournament import (
     define_players,
     dilemma_tournament, 
-    tournament
+    tournament,
+    bot_hash,
+    result_store
     )
 from .population import (
     population_mode,
-    population
+    population,
+    replicator_mode,
+    moran_mode,
+    parameter_sweep,
+    island_mode
 )
@@ -1,4 +1,14 @@
 from .population import (
     population_mode,
     population
-)
\ No newline at end of file
+)
+from .wellmixed import (
+    wellmixed_mode,
+    replicator_mode,
+    moran_mode
+)
+from .sweep import (
+    parameter_sweep,
+    sweep
+)
+from .islands import island_mode
\ No newline at end of file
@@ -0,0 +1,256 @@
+import io
+import contextlib
+import multiprocessing
+from queue import Empty
+import numpy as np
+from prisoners_dilemma.tournament import define_players
+from prisoners_dilemma.population.population import population_mode
+
+# Ways islands can be connected for migration
+migration_topologies = ["ring", "all"]
+
+def migration_sources(index, n_islands, topology):
+	"""
+	Returns the islands that send migrants to island index.
+	"""
+	if n_islands == 1:
+		return []
+	if topology == "ring":
+		return [(index - 1) % n_islands]
+	return [jj for jj in range(n_islands) if jj != index]
+
+def run_island(index, settings, migrant_buffer, census_buffer, barrier, queue):
+	"""
+	Evolves a single island in its own process. Every migration_interval
+	evolutions the island writes its best scoring strategies to its slot in
+	the shared migrant buffer and its census to the shared census buffer,
+	waits for the other islands, then replaces random cells with migrants from
+	its source islands. All islands read the same census buffer, so they reach
+	the same global convergence decision and stop together. The census the
+	decision was made on is sent back as the last row of the island's census
+	cube.
+
+	Parameters
+	----------
+	index: int
+		Island number.
+	settings: dict
+		Island settings built by island_mode.run.
+	migrant_buffer: multiprocessing.Array
+		Shared (n_islands x migrants) buffer of emigrant strategies.
+	census_buffer: multiprocessing.Array
+		Shared (n_islands x players) buffer of island censuses.
+	barrier: multiprocessing.Barrier
+		Barrier shared by every island.
+	queue: multiprocessing.Queue
+		Queue results are sent back on.
+	"""
+	try:
+		n_islands = settings["n_islands"]
+		migrants = settings["migrants"]
+		interval = settings["migration_interval"]
+		sources = migration_sources(index, n_islands, settings["topology"])
+
+		model = population_mode(rng_seed=settings["seeds"][index],
+		                        quantile=settings["quantiles"][index],
+		                        win_condition=settings["win_conditions"][index],
+		                        **settings["kwargs"])
+		keys = np.array(list(model.players.keys()), dtype=float)
+		outbox = np.frombuffer(migrant_buffer, dtype=np.int32).reshape(n_islands, -1)
+		census = np.frombuffer(census_buffer).reshape(n_islands, -1)
+
+		model.spawn()
+		converged = False
+		while model.evolutions > 0 and not converged:
+
+			# Win condition messages would repeat every evolution
+			with contextlib.redirect_stdout(io.StringIO()):
+				model.round()
+				model.check_convergence()
+			model.respawn()
+			model.evolutions -= 1
+			model.steps += 1
+
+			if model.steps % interval and model.evolutions > 0:
+				continue
+
+			# Publish strategies that scored best before respawn, and census
+			best = np.argsort(model.score_cube[-1].ravel())[::-1][:migrants]
+			outbox[index, :len(best)] = model.field_cube[-1].ravel()[best]
+			census[index] = [(model.field == key).sum() for key in keys]
+			barrier.wait()
+
+			# Immigrants replace random cells
+			field = model.field.reshape(-1)
+			for source in sources:
+				cells = model.rng.choice(field.size, size=min(migrants, field.size),
+				                         replace=False)
+				field[cells] = outbox[source, :len(cells)]
+
+			# Global convergence across all islands
+			totals = census.sum(axis=0)
+			shares = totals / totals.sum()
+			converged = (shares.max() >= settings["global_win_condition"] or
+			             model.evolutions == 0)
+			barrier.wait()
+
+		# Record the state the stop decision was made on and judge the island
+		# winner on it too
+		final = census[index].copy()
+		if model.steps == 0:
+			final = np.array([(model.field == key).sum() for key in keys])
+		dominator = int(np.argmax(final))
+		winner = None
+		if final[dominator] >= settings["win_conditions"][index] * final.sum():
+			winner = model.players[dominator].__name__
+
+		census_cube = np.concatenate((model.census().reshape(-1, len(keys)),
+		                              np.expand_dims(final, axis=0)), axis=0)
+		queue.put((index, census_cube, model.steps, winner))
+
+	except Exception:
+		barrier.abort()
+		raise
+
+class island_mode():
+	"""
+	Runs several independent population_mode fields, or islands, in separate
+	processes, each with its own rng seed, quantile and win_condition. Every
+	migration_interval evolutions the best scoring strategies of each island
+	migrate to its neighbours through small shared-memory buffers. The
+	simulation stops when one algorithm holds global_win_condition of all
+	cells across every island, or when the evolutions run out.
+
+	Parameters
+	----------
+	n_islands: int, optional
+		Number of islands, each run in its own process. default: 4
+	migration_interval: int, optional
+		Evolutions between migrations. default: 10
+	migrants: int, optional
+		Number of strategies each island sends per migration. default: 5
+	migration_topology: str, optional
+		"ring" sends migrants to the next island, "all" to every other island.
+		default: "ring"
+	rng_seed: int, optional
+		Seed the per island seeds are derived from. default: None
+	quantiles: float or list of floats, optional
+		quantile of every island, or one value per island. default: 0.2
+	win_conditions: float or list of floats, optional
+		win_condition of every island, or one value per island. Recorded as
+		each island's winner but does not stop the simulation. default: 0.5
+	global_win_condition: float between 0 and 1, optional
+		Share of all cells across islands a single algorithm must reach before
+		the simulation stops. default: 0.5
+	**kwargs:
+		Remaining population_mode arguments shared by every island, e.g.
+		players, n_rounds, evolutions, field_size or topology.
+	"""
+
+	def __init__(self, n_islands=4, migration_interval=10, migrants=5,
+	             migration_topology="ring", rng_seed=None, quantiles=0.2,
+	             win_conditions=0.5, global_win_condition=0.5, **kwargs):
+		assert migration_topology in migration_topologies, (
+			f"{migration_topology} is not a valid topology. Must be one of:"
+			f"{migration_topologies}")
+
+		self.n_islands = n_islands
+		self.migration_interval = migration_interval
+		self.migrants = migrants
+		self.migration_topology = migration_topology
+		self.global_win_condition = global_win_condition
+		self.kwargs = kwargs
+
+		# Independent seeds, one per island
+		children = np.random.SeedSequence(rng_seed).spawn(n_islands)
+		self.seeds = [int(child.generate_state(1)[0]) for child in children]
+		self.quantiles = self.per_island(quantiles)
+		self.win_conditions = self.per_island(win_conditions)
+
+		# Player names, in field key order
+		enumeration = enumerate(define_players(kwargs.get("players")))
+		self.players = {number: player for number, player in enumeration}
+
+		# Results
+		self.census_cubes = []
+		self.steps = []
+		self.island_winners = []
+		self.winner = None
+		self.convergence = False
+
+	def per_island(self, value):
+		"""
+		Broadcasts a scalar setting to every island.
+		"""
+		if np.isscalar(value):
+			return [value] * self.n_islands
+		assert len(value) == self.n_islands, "Need one value per island."
+		return list(value)
+
+	def global_census(self):
+		"""
+		Returns the (states x players) census summed over every island.
+		"""
+		return sum(self.census_cubes)
+
+	def run(self, return_census_cube=False):
+		"""
+		Starts every island process and waits for them to finish.
+
+		Parameters
+		----------
+		return_census_cube: bool, optional
+			Returns the global census cube instead of self. Note: does not
+			return self and other methods cannot be chained. default: False
+		"""
+		settings = {"n_islands": self.n_islands, "migrants": self.migrants,
+		            "migration_interval": self.migration_interval,
+		            "topology": self.migration_topology, "seeds": self.seeds,
+		            "quantiles": self.quantiles,
+		            "win_conditions": self.win_conditions,
+		            "global_win_condition": self.global_win_condition,
+		            "kwargs": self.kwargs}
+
+		# Small shared buffers, written once per migration
+		migrant_buffer = multiprocessing.Array("i", self.n_islands * self.migrants,
+		                                       lock=False)
+		census_buffer = multiprocessing.Array("d", self.n_islands * len(self.players),
+		                                      lock=False)
+		barrier = multiprocessing.Barrier(self.n_islands)
+		results_queue = multiprocessing.Queue()
+
+		processes = [multiprocessing.Process(target=run_island,
+		                                     args=(index, settings, migrant_buffer,
+		                                           census_buffer, barrier,
+		                                           results_queue))
+		             for index in range(self.n_islands)]
+		for process in processes:
+			process.start()
+
+		results = {}
+		while len(results) < self.n_islands:
+			try:
+				index, census, steps, winner = results_queue.get(timeout=1)
+			except Empty:
+				if not any(process.is_alive() for process in processes):
+					raise RuntimeError("An island process failed.")
+				continue
+			results[index] = (census, steps, winner)
+		for process in processes:
+			process.join()
+
+		self.census_cubes = [results[index][0] for index in range(self.n_islands)]
+		self.steps = [results[index][1] for index in range(self.n_islands)]
+		self.island_winners = [results[index][2] for index in range(self.n_islands)]
+
+		# Declare a global winner
+		final = self.global_census()[-1]
+		dominator = int(np.argmax(final))
+		if final[dominator] >= self.global_win_condition * final.sum():
+			self.winner = self.players[dominator].__name__
+			self.convergence = True
+			print(self.winner, "has met the global win condition.")
+
+		if return_census_cube:
+			return self.global_census()
+		return self
@@ -1,10 +1,11 @@
 import os
 import sys
 from prisoners_dilemma.tournament import dilemma_tournament, define_players
+from prisoners_dilemma.tournament.progress import progress_monitor
+from prisoners_dilemma.population.topology import (grid_topologies,
+	grid_adjacency, edge_list_adjacency, load_edges)
+from prisoners_dilemma.population.selection import selection_policies
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-import imageio
 
 class population_mode(dilemma_tournament):
 	"""
@@ -41,16 +42,64 @@ class population_mode(dilemma_tournament):
 	quantile: float between 0 and 1, optional
 		How much of the map should be replaced each round. 0 would replace
 		nobody, 0.01 would replace the lowest 1%, and 1 would replace
-		everybody. default: 0.2
+		everybody. Only used by the "quantile" selection. default: 0.2
 	win_condition: float between 0 and 1, optional
 		How much of the map must be taken before declaring a victor. 
 		default: 0.5
+	topology: str or array-like of shape (m, 2), optional
+		Neighbourhood structure. "moore" or "von_neumann" build a grid
+		neighbourhood of the given radius. Any other string is read as the
+		path of an edge list file. An array of node pairs defines an arbitrary
+		undirected graph, for example a small-world or scale-free network,
+		over the row-major flattened field. The structure is precomputed once
+		as CSR adjacency arrays (indptr, indices). default: "moore"
+	radius: int, optional
+		Radius of grid neighbourhoods. default: 1
+	toroidal: bool, optional
+		Wraps grid edges around. default: False
+	pair_scoring: bool, optional
+		Plays every pair of algorithms present on the field once per round and
+		scores all cells with array operations instead of playing a match on
+		every edge. Required for graphs with millions of nodes. Exact for
+		deterministic algorithms and fixed n_rounds. default: False
+	decision_budget: float, optional
+		Maximum seconds a player algorithm may take for a single decision.
+		default: None
+	match_budget: float, optional
+		Maximum seconds a player algorithm may spend deciding over one match.
+		default: None
+	budget_policy: str, optional
+		"forfeit" voids an offender's points for the match it overran.
+		"disqualify" also stops it from playing or respawning afterwards.
+		default: "forfeit"
+	track_time: bool, optional
+		Records per bot CPU time and decisions per second even without
+		budgets. default: False
+	selection: str or function, optional
+		How cells change algorithm between rounds. "quantile" replaces the
+		lowest scorers with one random algorithm. "imitate_best" copies the
+		best scoring neighbour if it outscored the cell. "fermi" copies one
+		random neighbour with a probability rising with the score difference.
+		A function taking the model and returning the next flattened field
+		may also be given. default: "quantile"
+	temperature: float, optional
+		Selection noise of the "fermi" selection. default: 0.1
 	"""
 
+	# Gaussian used to draw the number of rounds when n_rounds is not given
+	round_mean = 50
+	round_sigma = 2
+
 	def __init__(self, players=None, n_rounds=None, evolutions=100,
 	             field_size=(10, 10), rng_seed=None, quantile=0.2,
-				 win_condition=0.5):
-		super().__init__(players, n_rounds, rng_seed)
+				 win_condition=0.5, topology="moore", radius=1, toroidal=False,
+				 pair_scoring=False, decision_budget=None, match_budget=None,
+				 budget_policy="forfeit", track_time=False, selection="quantile",
+				 temperature=0.1):
+		super().__init__(players, n_rounds, rng_seed,
+		                 decision_budget=decision_budget,
+		                 match_budget=match_budget,
+		                 budget_policy=budget_policy, track_time=track_time)
 
 		# Initialize temp field and score arrays
 		self.field = np.zeros(field_size)
@@ -63,17 +112,62 @@ class population_mode(dilemma_tournament):
 		# Set end conditions/flags & define rng seed
 		self.evolutions = evolutions
 		self.convergence = False
+		self.winner = None
+		self.steps = 0
 		self.win_condition = win_condition
 
 		# Define variables for later use
 		self.rng = np.random.default_rng(rng_seed)
-		self.quantile = 0.2
+		self.quantile = quantile
+		self.temperature = temperature
+		if callable(selection):
+			self.selection = selection
+		else:
+			assert selection in selection_policies, (
+				f"{selection} is not a valid selection. Must be one of:"
+				f"{list(selection_policies)}")
+			self.selection = selection_policies[selection]
 
 		# Initialize historical field and score cubes
 		cube_shape = (0,) + field_size
 		self.field_cube = np.empty(cube_shape)
 		self.score_cube = np.empty(cube_shape)
 
+		# Precompute neighbourhood structure
+		self.pair_scoring = pair_scoring
+		self.define_topology(topology, radius, toroidal)
+
+	def define_topology(self, topology="moore", radius=1, toroidal=False):
+		"""
+		Builds the CSR adjacency arrays shared by scoring, normalisation and
+		respawn. Also defines the reference cells used to set the respawn
+		cutoff: cells with a full neighbourhood on grids, every node on
+		arbitrary graphs.
+
+		Parameters
+		----------
+		topology: str or array-like of shape (m, 2), optional
+			See class docstring. default: "moore"
+		radius: int, optional
+			Radius of grid neighbourhoods. default: 1
+		toroidal: bool, optional
+			Wraps grid edges around. default: False
+		"""
+		n_nodes = self.field.size
+		if isinstance(topology, str) and topology in grid_topologies:
+			self.indptr, self.indices = grid_adjacency(self.field.shape,
+			                                           topology, radius,
+			                                           toroidal)
+			self.degree = np.diff(self.indptr)
+			self.reference = self.degree == self.degree.max()
+		else:
+			if isinstance(topology, str):
+				topology = load_edges(topology)
+			self.indptr, self.indices = edge_list_adjacency(n_nodes, topology)
+			self.degree = np.diff(self.indptr)
+			self.reference = np.ones(n_nodes, dtype=bool)
+		return self
+
 
 	def spawn(self):
 		"""
@@ -81,57 +175,78 @@ class population_mode(dilemma_tournament):
 		assigned a random algorithm such that the field is filled and 
 		randomized to start.
 		"""
-		for ii in range(self.field.shape[0]):
-			for nn in range(self.field.shape[1]):
-				self.field[ii,nn] = self.rng.choice(list(self.players.keys()))
+		self.field[...] = self.rng.choice(list(self.players.keys()),
+		                                  size=self.field.shape)
 		return self
 
 	def round(self):
 		"""
-		Runs a single round. Iterates through every player on the field from 
-		right to left, top to bottom. Tests every player-algorithm against all
-		neighbors below and to their immediate right. This ensure all player-
-		algorithms are only tested against each neighbor once. After finishing
-		a point's interation, that point's score is normalized to the number of
-		neighbors it has. This prevents the edge and corner positions from
-		unfair disadvantage.
+		Runs a single round. Iterates through every player on the field in
+		row-major order and tests its algorithm against every neighbour in the
+		precomputed adjacency. Afterwards, every point's score is normalized to
+		the number of neighbors it has. This prevents the edge and corner
+		positions from unfair disadvantage.
+
+		If pair_scoring is set, defers to pair_round instead.
 		"""
-		for ii in range(self.field.shape[0]):
-			for nn in range(self.field.shape[1]):
-
-				# Define this bot and identify neighbors
-				this_bot = self.field[ii, nn]
-				neighbor_indices = [
-					(ii - 1, nn),  # Top neighbor
-					(ii + 1, nn),  # Bottom neighbor
-					(ii, nn - 1),  # Left neighbor
-					(ii, nn + 1),  # Right neighbor
-					(ii - 1, nn - 1), # Top-left neighbor
-					(ii + 1, nn - 1), # Bottom-left neighbor
-					(ii + 1, nn + 1), # Bottom-right neighbor
-					(ii - 1, nn + 1) # Top-right neighbor
-				]
-
-				# Filter out edge cases
-				valid_neighbor_indices = [(jj, kk) for jj, kk in neighbor_indices 
-										  if 0 <= jj < self.field.shape[0] and 
-										  0 <= kk < self.field.shape[1]]
-
-				# Select only Lower and Right Neighbors
-				relevant_neighbor_indicies = [(jj, kk) for jj, kk in valid_neighbor_indices
-											  if (jj > ii or kk > nn) and not (jj > ii and kk < nn)]
-
-				# Gather list of neighbor functions with indicies
-				neighbors = [(self.field[index], index) for index in valid_neighbor_indices]
-				for neighbor in neighbors:
-					self.matchup(self.players[this_bot], 
-					             self.players[neighbor[0]], 
-								 (ii, nn), 
-								 neighbor[1])
-				
-				self.score_array[ii, nn] = (self.score_array[ii, nn] /
-										   len(valid_neighbor_indices))
-		
+		if self.pair_scoring:
+			return self.pair_round()
+
+		columns = self.field.shape[1]
+		field = self.field.ravel()
+		for node in range(field.size):
+
+			# Define this bot and look up neighbors
+			this_bot = self.players[field[node]]
+			location = divmod(node, columns)
+			neighbors = self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+			for neighbor in neighbors.tolist():
+				self.matchup(this_bot, self.players[field[neighbor]],
+				             location, divmod(neighbor, columns))
+
+		self.normalize()
+		return self
+
+	def pair_round(self):
+		"""
+		Runs a single round with array scoring. Every pair of algorithms
+		present on the field plays one match, filling a table of match scores.
+		Each cell is then awarded the table entry for every neighbour, twice,
+		as in round where every edge is played from both ends.
+		"""
+		field = self.field.ravel().astype(np.intp)
+		present = np.unique(field)
+
+		# Play each pair of algorithms present once
+		table = np.zeros((len(self.players),) * 2)
+		for ii, key_1 in enumerate(present):
+			for key_2 in present[ii:]:
+				nn = self.match_length()
+				_, _, score_1, score_2 = self.play(self.players[key_1],
+				                                   self.players[key_2], nn)
+				if key_1 == key_2:
+					table[key_1, key_2] = (score_1 + score_2) / 2
+				else:
+					table[key_1, key_2] = score_1
+					table[key_2, key_1] = score_2
+
+		# Sum table entries over every edge of every node
+		rows = np.repeat(np.arange(field.size), self.degree)
+		edge_scores = table[field[rows], field[self.indices]]
+		scores = 2 * np.bincount(rows, weights=edge_scores, minlength=field.size)
+		self.score_array += scores.reshape(self.field.shape)
+
+		self.normalize()
+		return self
+
+	def normalize(self):
+		"""
+		Divides every point's score by the number of neighbors it has.
+		"""
+		scores = self.score_array.reshape(-1)
+		connected = self.degree > 0
+		scores[connected] = scores[connected] / self.degree[connected]
 		return self
 
 	def matchup(self, bot_1, bot_2, bot_1_loc, bot_2_loc):
@@ -153,41 +268,24 @@ class population_mode(dilemma_tournament):
 		bot_2_loc: tuple
 			tuple indexing bot_2's position on the field
 		"""
-		nn = self.n_rounds
-		if not nn: # Random number of rounds if not user defined
-			nn = round(self.rng.normal(50, 2)) # Normal ditribution mean=50, one_sigma=2
-		bot_1_history = []
-		bot_2_history = []
-
-		# Run game nn number of times
-		for ii in range(nn):
-
-			# Collect bot decisions
-			decision_1 = bot_1(bot_2_history)
-			decision_2 = bot_2(bot_1_history)
+		nn = self.match_length()
+		_, _, score_1, score_2 = self.play(bot_1, bot_2, nn)
 
-			# Run dilemma, store score_tuple
-			score_tuple = self.award_points(decision_1, decision_2)
+		# Update scores
+		self.score_array[bot_1_loc] += score_1
+		self.score_array[bot_2_loc] += score_2
 
-			# Unpack score_tuple and update scores
-			self.score_array[bot_1_loc] += score_tuple[0]
-			self.score_array[bot_2_loc] += score_tuple[1]
-
-			# Format each rounds results
-			round_info = [[bot_1.__name__, decision_1, score_tuple[0]],
-						[bot_2.__name__, decision_2, score_tuple[1]]]
-
-			# Update this matches history
-			bot_1_history.append(round_info[0])
-			bot_2_history.append(round_info[1])
+		# Lets long evolutions report rounds per second as they go
+		if self.progress is not None:
+			self.progress.update(0)
 
 		return self
 	
 	def respawn(self):
 		"""
-		This method changes those lowest scoring players on the field to a
-		random new algorithm. It sets a cutoff score at the given quantile.
-		Then replaces all players scoring below that mark. All changed players
+		This method changes players' algorithms according to the selection
+		policy. By default it sets a cutoff score at the given quantile, then
+		replaces all players scoring below that mark. All changed players
 		will change to the same new algorithm.
 
 		While changing players' algorithms, this method stores the current
@@ -201,12 +299,8 @@ class population_mode(dilemma_tournament):
 						np.expand_dims(self.field, axis=0)), 
 						axis=0) # Add array to cube
 
-		# Determine indicies to respawn
-		cutoff_score = int(np.quantile(self.score_array[1:-1, 1:-1], self.quantile))
-
-		# Respawn lowest scorers
-		boolray = self.score_array <= cutoff_score
-		self.field[boolray] = self.rng.choice(list(self.players.keys()))
+		# Apply the selection policy to every cell at once
+		self.field = self.selection(self).reshape(self.field.shape)
 
 		# Store score state
 		self.score_cube = np.concatenate((self.score_cube, 
@@ -228,10 +322,20 @@ class population_mode(dilemma_tournament):
 
 		if dominator == np.quantile(self.field, self.win_condition):
 			print(self.players[dominator].__name__, "has met the win condition.")
+			self.winner = self.players[dominator].__name__
 			self.convergence = True
 
 		return self
 
+	def census(self):
+		"""
+		Returns a (states x players) array counting how many cells use each
+		player algorithm in every stored field state. Columns follow the keys
+		of the players dictionary.
+		"""
+		return np.stack([(self.field_cube == key).sum(axis=(1, 2))
+		                 for key in self.players.keys()], axis=-1)
+
 	def generate_images(self):
 		"""
 		At the end of the simulation, this method iterates throught the field
@@ -240,6 +344,9 @@ class population_mode(dilemma_tournament):
 		algorithms are being shown. Images are saved in a folder named
 		dilemma-fields, overwriting and images previously saved in the folder.
 		"""
+		# Imported here so simulations without images skip the plotting stack
+		import matplotlib.pyplot as plt
+		import matplotlib.colors as mcolors
 
 		# Define custom colormap
 		possible_colors = ['blue', 'green', 'red', 'cyan', 'magenta', 'yellow', 'orange', 'purple', 'pink', 'brown']
@@ -284,6 +391,7 @@ class population_mode(dilemma_tournament):
 		name dilemma-fields with the images. Overwrites any previously saved
 		gif in the folder. Filename: dilemma-field-evolution.gif
 		"""
+		import imageio
 
 		self.generate_images()
 
@@ -296,7 +404,8 @@ class population_mode(dilemma_tournament):
 
 		return self
 
-	def run(self, return_field_cube=False, return_score_cube=False):
+	def run(self, return_field_cube=False, return_score_cube=False,
+	        progress=None, progress_interval=1.0, progress_file=None):
 		"""
 		This method runs the population simulation to it's conclusion. This
 		conclustion is either after so many evolutions or after a convergence
@@ -315,13 +424,34 @@ class population_mode(dilemma_tournament):
 			return_field_cube is also True, both are returned. Note: does not 
 			return self and other methods cannot be chained. 
 			default: False 
+		progress: function, optional
+			Called with a progress report dictionary (evolutions completed
+			out of the maximum, rounds per second, evolutions per second, eta
+			in seconds) at most once per progress_interval. default: None
+		progress_interval: float, optional
+			Minimum seconds between progress reports. default: 1.0
+		progress_file: str, optional
+			Path of a json lines file progress reports are written to.
+			default: None
 		"""
+		if progress is not None or progress_file is not None:
+			self.progress = progress_monitor(self.evolutions, "evolutions",
+			                                 progress, progress_interval,
+			                                 progress_file)
+
 		self.spawn()
 		while self.evolutions > 0 and not self.convergence:
 			self.round()
 			self.check_convergence()
 			self.respawn()
 			self.evolutions -= 1
+			self.steps += 1
+			if self.progress is not None:
+				self.progress.update(1)
+
+		if self.progress is not None:
+			self.progress.finish()
+			self.progress = None
 
 		if return_field_cube and return_score_cube:
 			return self.field_cube, self.score_cube
@@ -339,14 +469,20 @@ def population():
 	"""
 	# Possible arguments
 	possible_args = ["players", "n_rounds", "evolutions", "field_size",
-					 "rng_seed", "quantile", "win_condition"]
-	int_args = ["n_rounds", "evolutions", "rng_seed"]
-	float_args = ["quantile", "win_condition"]
+					 "rng_seed", "quantile", "win_condition", "topology", "radius",
+					 "toroidal", "pair_scoring", "decision_budget", "match_budget",
+					 "budget_policy", "track_time", "selection", "temperature"]
+	int_args = ["n_rounds", "evolutions", "rng_seed", "radius"]
+	bool_args = ["toroidal", "pair_scoring", "track_time"]
+	float_args = ["quantile", "win_condition", "decision_budget",
+	              "match_budget", "temperature"]
 	pop_args = ["show_scores", "return_scores", "return_all_results"]
+	progress_args = ["progress_file", "progress_interval"]
 	given_args = sys.argv[1:]
 
 	kwargs = {}
 	pwargs = {}
+	progress_kwargs = {}
 
 	# Store arguments as kwargs
 	for argv in given_args:
@@ -356,6 +492,13 @@ def population():
 			message = f"{argv} is not valid. Arguments must be 'argument=value' with no whitespace."
 			raise e from ValueError(message)
 
+		# Handle progress telemetry kwargs
+		if key in progress_args:
+			if key == "progress_interval":
+				value = float(value)
+			progress_kwargs[key] = value
+			continue
+
 		# Handle population kwargs
 		if key in pop_args:
 			if value == "False":
@@ -376,6 +519,14 @@ def population():
 			if key in float_args:
 				kwargs[key] = float(value)
 
+			# Boolean Arguments
+			if key in bool_args:
+				kwargs[key] = value != "False"
+
+			# Topology name or edge list path, budget policy, selection
+			if key in ["topology", "budget_policy", "selection"]:
+				kwargs[key] = value
+
 			# Parse field size
 			if key == "field_size":
 				values = value.strip("()").split(",")
@@ -395,8 +546,10 @@ def population():
 						"this kwarg must be an integers.")
 			raise e from ValueError(message)
 
+	model = population_mode(**kwargs)
 	if pwargs:
-		population_mode(**kwargs).run(**pwargs)
+		model.run(**pwargs, **progress_kwargs)
 	else:
-		population_mode(**kwargs).run().generate_gif()
+		model.run(**progress_kwargs).generate_gif()
+	model.budget_report()
 	return 0
\ No newline at end of file
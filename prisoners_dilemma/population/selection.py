@@ -0,0 +1,91 @@
+import numpy as np
+
+# Every policy takes a population_mode and returns the next row-major
+# flattened field. All cells update synchronously from the current field and
+# score_array, using the model's CSR adjacency (indptr, indices, degree).
+
+def eligible_keys(model):
+	"""
+	Returns the player keys that may spread, i.e. those not disqualified.
+	"""
+	return np.array([key for key, player in model.players.items()
+	                 if not model.disqualified(player)], dtype=float)
+
+def quantile_selection(model):
+	"""
+	Replaces every cell scoring at or below the quantile cutoff with a single
+	random algorithm. The cutoff is taken over the reference cells only.
+	"""
+	field = model.field.reshape(-1).copy()
+	scores = model.score_array.reshape(-1)
+
+	reference_scores = scores[model.reference]
+	cutoff_score = int(np.quantile(reference_scores, model.quantile))
+	field[scores <= cutoff_score] = model.rng.choice(eligible_keys(model))
+	return field
+
+def imitate_best_selection(model):
+	"""
+	Every cell adopts the algorithm of its highest scoring neighbour if that
+	neighbour outscored it. Ties between neighbours are broken at random.
+	Neighbours playing disqualified algorithms are never imitated.
+	"""
+	field = model.field.reshape(-1).copy()
+	scores = model.score_array.reshape(-1)
+	indptr, indices, degree = model.indptr, model.indices, model.degree
+	if indices.size == 0:
+		return field
+
+	# Neighbour score on every edge, -inf where it may not be imitated
+	rows = np.repeat(np.arange(field.size), degree)
+	allowed = np.isin(field[indices], eligible_keys(model))
+	edge_scores = np.where(allowed, scores[indices], -np.inf)
+
+	# Row maxima over non-empty rows
+	connected = np.flatnonzero(degree)
+	best = np.full(field.size, -np.inf)
+	best[connected] = np.maximum.reduceat(edge_scores, indptr[connected])
+
+	# One random edge among those reaching the row maximum
+	ties = np.where(edge_scores == best[rows], model.rng.random(rows.size), -1.0)
+	pick = np.full(field.size, -1.0)
+	pick[connected] = np.maximum.reduceat(ties, indptr[connected])
+	chosen = np.flatnonzero((ties == pick[rows]) & (ties >= 0))
+
+	# Adopt only strictly better neighbours
+	cells = rows[chosen]
+	better = best[cells] > scores[cells]
+	field[cells[better]] = field[indices[chosen[better]]]
+	return field
+
+def fermi_selection(model):
+	"""
+	Proportional imitation. Every cell compares itself with one random
+	neighbour and adopts its algorithm with the Fermi probability
+	1 / (1 + exp(-(neighbour_score - own_score) / temperature)). Low
+	temperatures approach imitating any better neighbour, high temperatures
+	approach random drift. Neighbours playing disqualified algorithms are
+	never imitated.
+	"""
+	field = model.field.reshape(-1).copy()
+	scores = model.score_array.reshape(-1)
+	indptr, indices, degree = model.indptr, model.indices, model.degree
+
+	# One random neighbour per connected cell
+	cells = np.flatnonzero(degree)
+	offsets = np.floor(model.rng.random(cells.size) * degree[cells])
+	neighbors = indices[indptr[cells] + offsets.astype(np.intp)]
+
+	delta = scores[neighbors] - scores[cells]
+	with np.errstate(over="ignore"):
+		probability = 1 / (1 + np.exp(-delta / model.temperature))
+
+	adopt = model.rng.random(cells.size) < probability
+	adopt &= np.isin(field[neighbors], eligible_keys(model))
+	field[cells[adopt]] = field[neighbors[adopt]]
+	return field
+
+# Named selection policies accepted by population_mode
+selection_policies = {"quantile": quantile_selection,
+                      "imitate_best": imitate_best_selection,
+                      "fermi": fermi_selection}
@@ -0,0 +1,197 @@
+import io
+import os
+import sys
+import csv
+import json
+import hashlib
+import itertools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from prisoners_dilemma.population.population import population_mode
+
+# population_mode kwargs that may be swept
+sweep_args = ["n_rounds", "evolutions", "field_size", "quantile",
+              "win_condition", "selection", "temperature"]
+
+def sweep_configurations(grid):
+	"""
+	Expands a parameter grid into a list of configuration dictionaries, one
+	for every combination of values.
+
+	Parameters
+	----------
+	grid: dict
+		Maps population_mode kwargs to lists of values to try.
+	"""
+	for key in grid:
+		assert key in sweep_args, (f"{key} is not a valid kwarg. kwargs must "
+		                            f"be one of:{sweep_args}")
+
+	keys = sorted(grid)
+	return [dict(zip(keys, values))
+	        for values in itertools.product(*(grid[key] for key in keys))]
+
+def run_seed(config, replicate, rng_seed=0):
+	"""
+	Returns the deterministic rng seed for one replicate of a configuration.
+	The seed depends only on the configuration values, the replicate number
+	and rng_seed, so it is stable when the grid is extended or reordered.
+	"""
+	raw = json.dumps([config, replicate, rng_seed], sort_keys=True)
+	return int(hashlib.sha256(raw.encode()).hexdigest()[:8], 16)
+
+def run_configuration(config, replicate, seed, players=None):
+	"""
+	Runs a single population simulation without generating images and returns
+	a summary dictionary with the winner, the number of evolutions run, whether
+	the simulation converged and the final census.
+
+	Parameters
+	----------
+	config: dict
+		population_mode kwargs for this run.
+	replicate: int
+		Replicate number, recorded in the summary.
+	seed: int
+		rng seed for this run.
+	players: str, optional
+		Name of .py script containing user algorithms. default: None
+	"""
+	kwargs = dict(config)
+	if "field_size" in kwargs:
+		kwargs["field_size"] = tuple(kwargs["field_size"])
+
+	# Silence win condition messages from thousands of runs
+	with contextlib.redirect_stdout(io.StringIO()):
+		model = population_mode(players=players, rng_seed=seed, **kwargs).run()
+
+	final = {model.players[key].__name__: int(count)
+	         for key, count in zip(model.players, model.census()[-1])}
+	return {"config": json.dumps(config, sort_keys=True),
+	        "replicate": replicate, "seed": seed, "winner": model.winner,
+	        "steps": model.steps, "converged": model.convergence,
+	        "census": json.dumps(final)}
+
+def parameter_sweep(grid, replicates=1, output="dilemma-sweep.csv",
+                    processes=None, rng_seed=0, players=None):
+	"""
+	Runs every configuration in a parameter grid for some number of
+	replicates in a process pool. Each run gets a deterministic seed from
+	run_seed and skips image generation. One summary row per run is appended
+	to a csv file as runs finish. Runs already present in the output file are
+	skipped, so an interrupted sweep picks up where it left off. Resuming
+	requires the same grid keys, otherwise ValueError is raised.
+
+	Parameters
+	----------
+	grid: dict
+		Maps population_mode kwargs to lists of values to try. Valid keys are
+		n_rounds, evolutions, field_size, quantile, win_condition, selection
+		and temperature. Selections must be given by name.
+	replicates: int, optional
+		Number of runs per configuration. default: 1
+	output: str, optional
+		Path of the csv file summaries are written to.
+		default: dilemma-sweep.csv
+	processes: int, optional
+		Number of worker processes. default: os.cpu_count()
+	rng_seed: int, optional
+		Base seed combined with each configuration to seed every run.
+		default: 0
+	players: str, optional
+		Name of .py script containing user algorithms. default: None
+	"""
+	configs = sweep_configurations(grid)
+	columns = (sorted(grid) + ["replicate", "seed", "winner", "steps",
+	                           "converged", "census", "config"])
+
+	# Collect runs already finished by an earlier invocation
+	done = set()
+	if os.path.exists(output):
+		with open(output, newline="") as f:
+			reader = csv.DictReader(f)
+			if reader.fieldnames is not None and reader.fieldnames != columns:
+				raise ValueError(f"{output} has columns {reader.fieldnames}, "
+				                 f"this sweep writes {columns}. Use another "
+				                 "output or the same grid keys.")
+			for row in reader:
+				done.add((row["config"], int(row["replicate"])))
+
+	todo = [(config, replicate) for config in configs
+	        for replicate in range(replicates)
+	        if (json.dumps(config, sort_keys=True), replicate) not in done]
+
+	new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+	with open(output, "a", newline="") as f:
+		writer = csv.DictWriter(f, fieldnames=columns)
+		if new_file:
+			writer.writeheader()
+			f.flush()
+
+		with ProcessPoolExecutor(max_workers=processes) as pool:
+			futures = {pool.submit(run_configuration, config, replicate,
+			                       run_seed(config, replicate, rng_seed),
+			                       players): config
+			           for config, replicate in todo}
+
+			for future in as_completed(futures):
+				summary = future.result()
+				summary.update(futures[future])
+				writer.writerow(summary)
+				f.flush()
+
+	return output
+
+
+# Code allowing command line usage is below this comment
+def sweep():
+	"""
+	Intended for command line usage. Parses sys.argv list into a parameter
+	grid and sweep options, then runs parameter_sweep. Grid values are comma
+	separated lists, with field sizes written as ROWSxCOLUMNS, e.g.
+	quantile=0.1,0.2 field_size=10x10,20x20 selection=quantile,fermi. Other
+	options are replicates, processes, output, rng_seed and players.
+	"""
+	option_args = ["replicates", "processes", "output", "rng_seed", "players"]
+	int_args = ["n_rounds", "evolutions", "replicates", "processes", "rng_seed"]
+	float_args = ["quantile", "win_condition", "temperature"]
+	given_args = sys.argv[1:]
+
+	grid = {}
+	options = {}
+
+	for argv in given_args:
+		try:
+			key, value = argv.split('=')
+		except ValueError as e:
+			message = (f"{argv} is not valid. Arguments must be "
+			            "'argument=value' with no whitespace.")
+			raise e from ValueError(message)
+
+		assert key in sweep_args + option_args, (f"{key} is not a valid kwarg. "
+		                        f"kwargs must be one of:{sweep_args + option_args}")
+
+		try:
+
+			# Sweep options take a single value
+			if key in option_args:
+				options[key] = int(value) if key in int_args else value
+				continue
+
+			values = value.split(",")
+			if key in int_args:
+				grid[key] = [int(v) for v in values]
+			if key in float_args:
+				grid[key] = [float(v) for v in values]
+			if key == "field_size":
+				grid[key] = [tuple(int(n) for n in v.split("x")) for v in values]
+			if key == "selection":
+				grid[key] = values
+
+		except ValueError as e:
+			message = f"Invalid value for {key}={value}."
+			raise e from ValueError(message)
+
+	output = parameter_sweep(grid, **options)
+	print(f"Sweep results written to {output}")
+	return 0
@@ -0,0 +1,145 @@
+import numpy as np
+
+# Named grid neighbourhoods accepted by population_mode
+grid_topologies = ["moore", "von_neumann"]
+
+def grid_offsets(topology="moore", radius=1):
+	"""
+	Returns the list of (row, column) offsets making up a grid neighbourhood.
+	The radius 1 Moore neighbourhood keeps the historical ordering: top,
+	bottom, left, right, top-left, bottom-left, bottom-right, top-right.
+
+	Parameters
+	----------
+	topology: str, optional
+		"moore" uses every cell within Chebyshev distance radius, "von_neumann"
+		every cell within Manhattan distance radius. default: "moore"
+	radius: int, optional
+		Neighbourhood radius. default: 1
+	"""
+	assert topology in grid_topologies, (f"{topology} is not a valid grid "
+	                                     f"topology. Must be one of:{grid_topologies}")
+
+	if topology == "moore" and radius == 1:
+		return [(-1, 0), (1, 0), (0, -1), (0, 1),
+		        (-1, -1), (1, -1), (1, 1), (-1, 1)]
+
+	offsets = []
+	for di in range(-radius, radius + 1):
+		for dj in range(-radius, radius + 1):
+			if di == 0 and dj == 0:
+				continue
+			if topology == "von_neumann" and abs(di) + abs(dj) > radius:
+				continue
+			offsets.append((di, dj))
+	return offsets
+
+def csr_from_edges(n_nodes, sources, targets):
+	"""
+	Builds CSR adjacency arrays (indptr, indices) from directed edges. The
+	neighbours of node u are indices[indptr[u]:indptr[u+1]], kept in the order
+	the edges were given.
+
+	Parameters
+	----------
+	n_nodes: int
+		Number of nodes in the graph.
+	sources: array of ints
+		Source node of every edge.
+	targets: array of ints
+		Target node of every edge.
+	"""
+	index_type = np.int32 if n_nodes < 2**31 else np.int64
+	order = np.argsort(sources, kind="stable")
+	indices = targets[order].astype(index_type)
+	indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+	np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+	return indptr, indices
+
+def grid_adjacency(shape, topology="moore", radius=1, toroidal=False):
+	"""
+	Returns CSR adjacency arrays for a grid of the given shape. Nodes are the
+	row-major flattened cell indices.
+
+	Parameters
+	----------
+	shape: tuple of 2 ints
+		Field size.
+	topology: str, optional
+		"moore" or "von_neumann". default: "moore"
+	radius: int, optional
+		Neighbourhood radius. default: 1
+	toroidal: bool, optional
+		Wraps the grid edges around so every cell has a full neighbourhood.
+		default: False
+	"""
+	rows, columns = shape
+	row_index, column_index = np.divmod(np.arange(rows * columns), columns)
+
+	sources = []
+	targets = []
+	for di, dj in grid_offsets(topology, radius):
+		ii = row_index + di
+		jj = column_index + dj
+		if toroidal:
+			ii %= rows
+			jj %= columns
+			valid = np.ones(ii.shape, dtype=bool)
+		else:
+			valid = (ii >= 0) & (ii < rows) & (jj >= 0) & (jj < columns)
+		sources.append(np.flatnonzero(valid))
+		targets.append(ii[valid] * columns + jj[valid])
+
+	sources = np.concatenate(sources)
+	targets = np.concatenate(targets)
+
+	# Wrapping small grids can produce self loops and repeated neighbours
+	if toroidal:
+		sources, targets = unique_edges(rows * columns, sources, targets)
+
+	return csr_from_edges(rows * columns, sources, targets)
+
+def unique_edges(n_nodes, sources, targets):
+	"""
+	Drops self loops and repeated edges, returning (sources, targets) sorted by
+	source then target.
+	"""
+	keep = sources != targets
+	keys = np.unique(sources[keep].astype(np.int64) * n_nodes + targets[keep])
+	return np.divmod(keys, n_nodes)
+
+def edge_list_adjacency(n_nodes, edges):
+	"""
+	Returns CSR adjacency arrays for an arbitrary undirected graph, such as a
+	small-world or scale-free network. Edges are symmetrized, and self loops
+	and duplicates are dropped.
+
+	Parameters
+	----------
+	n_nodes: int
+		Number of nodes in the graph.
+	edges: array-like of shape (m, 2)
+		Pairs of node indices joined by an edge.
+	"""
+	edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+	if edges.size and (edges.min() < 0 or edges.max() >= n_nodes):
+		raise ValueError(f"Edge list references nodes outside 0-{n_nodes - 1}.")
+
+	sources = np.concatenate((edges[:, 0], edges[:, 1]))
+	targets = np.concatenate((edges[:, 1], edges[:, 0]))
+	sources, targets = unique_edges(n_nodes, sources, targets)
+	return csr_from_edges(n_nodes, sources, targets)
+
+def load_edges(path):
+	"""
+	Loads an edge list file with one "source target" pair per line. Values may
+	be separated by whitespace or commas.
+
+	Parameters
+	----------
+	path: str
+		Location of the edge list file.
+	"""
+	with open(path) as f:
+		text = f.read().replace(",", " ")
+	return np.array(text.split(), dtype=np.int64).reshape(-1, 2)
@@ -0,0 +1,229 @@
+import numpy as np
+from prisoners_dilemma.tournament import dilemma_tournament
+
+class wellmixed_mode():
+	"""
+	Base class for evolution in a well-mixed population. Instead of simulating
+	every agent's matches, the round-robin tournament is run once to build a
+	k x k matrix of mean payoffs per round. Each generation then only costs
+	O(k^2) regardless of the number of virtual agents. Results are recorded in
+	a census cube with the same (states x players) layout as
+	population_mode.census. Subclasses define spawn, which sets the initial
+	state, step, which advances one generation, and counts, which returns the
+	number of agents using each player algorithm.
+
+	Parameters
+	----------
+	players: str, optional
+		Name of .py script containing algorithms the user wants included. Note:
+		algorithms must take in 1 argument that is nested lists containing
+		opponent information. Player algorithms must return a bool for which
+		True indicates Cooperation.
+	n_rounds: int, optional
+		Number of rounds played between each player algorithm when building
+		the payoff matrix. By default, the number of rounds played are randomly
+		selected from a gaussian with a mean of 200 and standard deviation of
+		10
+	generations: int, optional
+		Maximum number of generations before simulation stops. default: 1000
+	population_size: int, optional
+		Number of virtual agents. default: 10000
+	rng_seed: int, optional
+		rng seed can be given for replicability. Note: this seed in not passed
+		to player algorithms. Player algorithm behavior may prevent perfect
+		replication. default: None
+	win_condition: float between 0 and 1, optional
+		Share of the population a single algorithm must reach before declaring
+		a victor. default: 0.5
+	"""
+
+	def __init__(self, players=None, n_rounds=None, generations=1000,
+	             population_size=10000, rng_seed=None, win_condition=0.5):
+		# Tournament used to build the payoff matrix
+		self.tournament = dilemma_tournament(players, n_rounds, rng_seed)
+		enumeration = enumerate(self.tournament.players)
+		self.players = {number: player for number, player in enumeration}
+		self.matrix = None
+
+		# Set end conditions/flags & define rng seed
+		self.generations = generations
+		self.population_size = population_size
+		self.convergence = False
+		self.winner = None
+		self.win_condition = win_condition
+		self.rng = np.random.default_rng(rng_seed)
+
+		# Initialize historical census cube
+		self.census_cube = np.empty((0, len(self.players)))
+
+	def build_matrix(self):
+		"""
+		Runs the round-robin tournament once and stores the mean payoff matrix.
+		"""
+		self.matrix = self.tournament.payoff_matrix()
+		return self
+
+	def record(self):
+		"""
+		Appends the current counts to the census cube.
+		"""
+		self.census_cube = np.concatenate((self.census_cube,
+		                                   np.expand_dims(self.counts(), axis=0)),
+		                                  axis=0)
+		return self
+
+	def check_convergence(self):
+		"""
+		This method checks if the win_condition had been met by any algorithm.
+		If it has, this method set the convergence flag to True.
+		"""
+		counts = self.counts()
+		dominator = int(np.argmax(counts))
+		if counts[dominator] >= self.win_condition * counts.sum():
+			print(self.players[dominator].__name__, "has met the win condition.")
+			self.winner = self.players[dominator].__name__
+			self.convergence = True
+		return self
+
+	def run(self, return_census_cube=False):
+		"""
+		Builds the payoff matrix if needed, then evolves the population until
+		the win_condition is met or the generations run out.
+
+		Parameters
+		----------
+		return_census_cube: bool, optional
+			Returns the census cube instead of self. Note: does not return self
+			and other methods cannot be chained. default: False
+		"""
+		if self.matrix is None:
+			self.build_matrix()
+
+		self.spawn()
+		self.record()
+		while self.generations > 0 and not self.convergence:
+			self.step()
+			self.record()
+			self.check_convergence()
+			self.generations -= 1
+
+		if return_census_cube:
+			return self.census_cube
+		return self
+
+class replicator_mode(wellmixed_mode):
+	"""
+	Integrates the replicator dynamics dx_i/dt = x_i (f_i - phi) with forward
+	Euler steps, where f = A x is each algorithm's expected payoff against the
+	population and phi = x . f is the population average. The census cube
+	stores population shares scaled by population_size.
+
+	Parameters
+	----------
+	dt: float, optional
+		Size of each integration step. default: 0.1
+	initial: array of floats, optional
+		Initial share of each player algorithm. default: uniform
+
+	See wellmixed_mode for the remaining parameters.
+	"""
+
+	def __init__(self, players=None, n_rounds=None, generations=1000,
+	             population_size=10000, rng_seed=None, win_condition=0.5,
+	             dt=0.1, initial=None):
+		super().__init__(players, n_rounds, generations, population_size,
+		                 rng_seed, win_condition)
+		self.dt = dt
+		self.initial = initial
+		self.shares = None
+
+	def spawn(self):
+		"""
+		Sets the initial population shares.
+		"""
+		if self.initial is None:
+			self.shares = np.full(len(self.players), 1 / len(self.players))
+		else:
+			self.shares = np.asarray(self.initial, dtype=float)
+			self.shares = self.shares / self.shares.sum()
+		return self
+
+	def step(self):
+		"""
+		Takes one Euler step of the replicator dynamics.
+		"""
+		fitness = self.matrix @ self.shares
+		average = self.shares @ fitness
+		self.shares = self.shares + self.dt * self.shares * (fitness - average)
+
+		# Keep shares on the simplex despite discretization error
+		self.shares = np.clip(self.shares, 0, None)
+		self.shares = self.shares / self.shares.sum()
+		return self
+
+	def counts(self):
+		return self.shares * self.population_size
+
+class moran_mode(wellmixed_mode):
+	"""
+	Runs a stochastic Moran process over strategy counts. In each birth-death
+	event an agent is chosen to reproduce with probability proportional to
+	its fitness and a uniformly random agent is replaced by the offspring.
+	Fitness is exp(selection_intensity * payoff), where payoff is the mean
+	payoff against every other agent in the population.
+
+	Each generation performs events_per_generation events in one batch: births
+	are drawn multinomially and deaths hypergeometrically with fitness held
+	fixed for the batch. events_per_generation=1 is the exact Moran process.
+
+	Parameters
+	----------
+	selection_intensity: float, optional
+		Strength of selection. 0 gives neutral drift. default: 1.0
+	events_per_generation: int, optional
+		Birth-death events per generation. default: population_size // 100
+
+	See wellmixed_mode for the remaining parameters.
+	"""
+
+	def __init__(self, players=None, n_rounds=None, generations=1000,
+	             population_size=10000, rng_seed=None, win_condition=0.5,
+	             selection_intensity=1.0, events_per_generation=None):
+		# Payoffs are averaged over every other agent
+		assert population_size >= 2, ("A Moran process needs a population_size "
+		                              "of at least 2.")
+		super().__init__(players, n_rounds, generations, population_size,
+		                 rng_seed, win_condition)
+		self.selection_intensity = selection_intensity
+		if events_per_generation is None:
+			events_per_generation = max(population_size // 100, 1)
+		self.events_per_generation = events_per_generation
+		self.population = None
+
+	def spawn(self):
+		"""
+		Assigns every virtual agent a random algorithm.
+		"""
+		k = len(self.players)
+		self.population = self.rng.multinomial(self.population_size,
+		                                       np.full(k, 1 / k))
+		return self
+
+	def step(self):
+		"""
+		Performs one generation of birth-death events.
+		"""
+		# Mean payoff against everyone else, excluding self-interaction
+		payoff = ((self.matrix @ self.population - np.diag(self.matrix))
+		          / (self.population_size - 1))
+		weights = self.population * np.exp(self.selection_intensity
+		                                    * (payoff - payoff.max()))
+		births = self.rng.multinomial(self.events_per_generation,
+		                              weights / weights.sum())
+		deaths = self.rng.multivariate_hypergeometric(self.population,
+		                                              self.events_per_generation)
+		self.population = self.population + births - deaths
+		return self
+
+	def counts(self):
+		return self.population
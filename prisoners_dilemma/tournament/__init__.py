@@ -4,3 +4,14 @@ from .tournament import (
     dilemma_tournament, 
     tournament
     )
+from .store import (
+    bot_hash,
+    result_store,
+    store_gc
+    )
+from .workers import (
+    external_bot,
+    external_players,
+    worker_pool,
+    worker
+    )
\ No newline at end of file
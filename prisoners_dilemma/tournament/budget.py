@@ -0,0 +1,194 @@
+import time
+import signal
+import threading
+
+# Ways a bot that overruns its budget can be penalized
+budget_policies = ["forfeit", "disqualify"]
+
+class BudgetExceeded(Exception):
+	"""
+	Raised when a player algorithm overruns its decision or match budget.
+
+	Parameters
+	----------
+	name: str
+		Name of the offending player algorithm.
+	kind: str
+		"decision" or "match", whichever budget was exceeded.
+	"""
+
+	def __init__(self, name, kind):
+		super().__init__(f"{name} exceeded its {kind} time budget.")
+		self.name = name
+		self.kind = kind
+
+class time_budget():
+	"""
+	Times every decision a player algorithm makes, keeps cumulative CPU and
+	wall-clock time per bot and enforces optional per-decision and per-match
+	budgets. On the main thread of a POSIX system, decisions are interrupted
+	with SIGALRM once they run past the budget. Elsewhere the budget is
+	checked after the decision returns.
+
+	Parameters
+	----------
+	decision_budget: float, optional
+		Maximum seconds a single decision may take. default: None
+	match_budget: float, optional
+		Maximum seconds a bot may spend deciding over one match. default: None
+	policy: str, optional
+		"forfeit" voids the offender's points for the match in which it
+		overran. "disqualify" does the same and also skips every later match
+		involving the offender. default: "forfeit"
+	"""
+
+	def __init__(self, decision_budget=None, match_budget=None,
+	             policy="forfeit"):
+		assert policy in budget_policies, (f"{policy} is not a valid policy. "
+		                                   f"Must be one of:{budget_policies}")
+		self.decision_budget = decision_budget
+		self.match_budget = match_budget
+		self.policy = policy
+
+		# name -> [decisions, cpu_time, wall_time, violations]
+		self.stats = {}
+		self.disqualified = set()
+
+		self.preempt = (hasattr(signal, "setitimer") and
+		                threading.current_thread() is threading.main_thread() and
+		                (decision_budget is not None or match_budget is not None))
+		self.handler_installed = False
+
+	def limit(self, spent):
+		"""
+		Returns the seconds the next decision may take given the time already
+		spent in this match, or None if unlimited.
+		"""
+		limits = []
+		if self.decision_budget is not None:
+			limits.append(self.decision_budget)
+		if self.match_budget is not None:
+			limits.append(self.match_budget - spent)
+		return min(limits) if limits else None
+
+	def interrupt(self, signum, frame):
+		raise BudgetExceeded(self.current, "decision")
+
+	def decide(self, bot, opponent_history, spent):
+		"""
+		Calls a player algorithm, timing and enforcing its budget.
+
+		Parameters
+		----------
+		bot: function
+			Player algorithm.
+		opponent_history: list
+			History passed to the player algorithm.
+		spent: list of one float
+			Seconds the bot has spent deciding in this match. Updated in place.
+		"""
+		name = bot.__name__
+		limit = self.limit(spent[0])
+		armed = self.preempt and limit is not None
+		if armed:
+			if not self.handler_installed:
+				signal.signal(signal.SIGALRM, self.interrupt)
+				self.handler_installed = True
+			self.current = name
+			signal.setitimer(signal.ITIMER_REAL, max(limit, 1e-6))
+
+		wall = time.perf_counter()
+		cpu = time.process_time()
+		try:
+			decision = bot(opponent_history)
+		except BudgetExceeded:
+			self.charge(name, time.process_time() - cpu,
+			            time.perf_counter() - wall, spent, check=False)
+			self.violation(name)
+			raise
+		finally:
+			if armed:
+				signal.setitimer(signal.ITIMER_REAL, 0)
+
+		self.charge(name, time.process_time() - cpu, time.perf_counter() - wall,
+		            spent)
+		return decision
+
+	def charge(self, name, cpu, wall, spent, decisions=1, check=True):
+		"""
+		Records time spent by a bot and raises BudgetExceeded if it overran.
+
+		Parameters
+		----------
+		name: str
+			Name of the player algorithm.
+		cpu: float
+			CPU seconds spent.
+		wall: float
+			Wall-clock seconds spent.
+		spent: list of one float
+			Seconds the bot has spent deciding in this match. Updated in place.
+		decisions: int, optional
+			Number of decisions the time covers. default: 1
+		check: bool, optional
+			Enforces the budgets. default: True
+		"""
+		stats = self.stats.setdefault(name, [0, 0.0, 0.0, 0])
+		stats[0] += decisions
+		stats[1] += cpu
+		stats[2] += wall
+		spent[0] += wall
+
+		if not check:
+			return self
+
+		kind = None
+		if (self.decision_budget is not None and
+		    wall / decisions > self.decision_budget):
+			kind = "decision"
+		elif self.match_budget is not None and spent[0] > self.match_budget:
+			kind = "match"
+		if kind:
+			self.violation(name)
+			raise BudgetExceeded(name, kind)
+		return self
+
+	def violation(self, name):
+		"""
+		Counts a budget violation and applies the disqualify policy.
+		"""
+		self.stats.setdefault(name, [0, 0.0, 0.0, 0])[3] += 1
+		if self.policy == "disqualify":
+			self.disqualified.add(name)
+		return self
+
+	def report(self, show=True):
+		"""
+		Returns a dictionary of per bot throughput statistics: decisions made,
+		cumulative CPU and wall-clock seconds, decisions per second, budget
+		violations and disqualification.
+
+		Parameters
+		----------
+		show: bool, optional
+			Prints the report as a table. default: True
+		"""
+		report = {}
+		for name, (decisions, cpu, wall, violations) in self.stats.items():
+			report[name] = {"decisions": decisions, "cpu_time": cpu,
+			                "wall_time": wall,
+			                "decisions_per_second": decisions / wall if wall else float("inf"),
+			                "violations": violations,
+			                "disqualified": name in self.disqualified}
+
+		if show:
+			print("\nThroughput - decisions per second of wall-clock time\n"
+			      "------------------------------")
+			ranked = sorted(report.items(),
+			                key=lambda item: item[1]["decisions_per_second"])
+			for name, row in ranked:
+				flag = " (disqualified)" if row["disqualified"] else ""
+				print(f"{name}: {row['decisions_per_second']:.0f} decisions/s, "
+				      f"{row['cpu_time']:.3f}s CPU, "
+				      f"{row['violations']} violations{flag}")
+		return report
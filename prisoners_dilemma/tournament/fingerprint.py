@@ -0,0 +1,106 @@
+import itertools
+import numpy as np
+
+def probe_sequences(short_length=5, long_length=64):
+	"""
+	Returns the fixed set of scripted opponent move sequences bots are probed
+	with. Every cooperate/defect sequence up to short_length rounds is
+	included, plus a few long patterns (constant, alternating, periodic and a
+	fixed pseudo-random sequence) so late-game behaviour is also compared.
+	Moves are bools where True indicates Cooperation.
+
+	Parameters
+	----------
+	short_length: int, optional
+		Length of the exhaustive short sequences. default: 5
+	long_length: int, optional
+		Length of the long patterns. default: 64
+	"""
+	probes = [list(moves) for moves in
+	          itertools.product((True, False), repeat=short_length)]
+
+	patterns = [(True,), (False,), (True, False), (False, True),
+	            (True, True, False), (False, False, True)]
+	for pattern in patterns:
+		probes.append([pattern[ii % len(pattern)] for ii in range(long_length)])
+
+	rng = np.random.default_rng(0)
+	probes.append([bool(move) for move in rng.integers(0, 2, long_length)])
+	return probes
+
+def fingerprint(bot, award_points, probes=None, decide=None):
+	"""
+	Returns a bot's responses to every probe sequence as a tuple of strings of
+	"C" and "D". Each probe is played twice. If the bot answers differently
+	the second time it is not deterministic and None is returned.
+
+	Parameters
+	----------
+	bot: function
+		Player algorithm.
+	award_points: function
+		Scores one dilemma, e.g. dilemma_tournament.award_points.
+	probes: list of lists of bools, optional
+		Scripted opponent moves. default: probe_sequences()
+	decide: function, optional
+		Called as decide(bot, opponent_history) to get a decision, e.g. to
+		apply time budgets. default: calls the bot directly
+	"""
+	if probes is None:
+		probes = probe_sequences()
+	if decide is None:
+		decide = lambda bot, opponent_history: bot(opponent_history)
+
+	responses = []
+	for probe in probes:
+		passes = []
+		for _ in range(2):
+			opponent_history = []
+			moves = []
+			for opponent_move in probe:
+				move = bool(decide(bot, opponent_history))
+				points = award_points(move, opponent_move)[1]
+				opponent_history.append(["probe", opponent_move, points])
+				moves.append("C" if move else "D")
+			passes.append("".join(moves))
+
+		if passes[0] != passes[1]:
+			return None
+		responses.append(passes[0])
+
+	return tuple(responses)
+
+def equivalence_classes(bots, award_points, probes=None, decide=None):
+	"""
+	Groups bots with identical fingerprints. Returns a list of classes, each
+	a list of bots, in order of first appearance. Non-deterministic bots, bots
+	hosted in external workers and bots that raise while probed (including
+	BudgetExceeded) are always placed in a class of their own.
+
+	Parameters
+	----------
+	bots: list of functions
+		Player algorithms.
+	award_points: function
+		Scores one dilemma, e.g. dilemma_tournament.award_points.
+	probes: list of lists of bools, optional
+		Scripted opponent moves. default: probe_sequences()
+	decide: function, optional
+		See fingerprint. default: None
+	"""
+	if probes is None:
+		probes = probe_sequences()
+
+	classes = {}
+	for ii, bot in enumerate(bots):
+		key = None
+		if not hasattr(bot, "pool"):
+			try:
+				key = fingerprint(bot, award_points, probes, decide)
+			except Exception:
+				key = None
+		if key is None:
+			key = ("unique", ii)
+		classes.setdefault(key, []).append(bot)
+
+	return list(classes.values())
@@ -0,0 +1,104 @@
+import time
+import json
+
+class progress_monitor():
+	"""
+	Tracks progress of a long simulation and periodically reports completed
+	units out of the total, rounds per second, units per second and an
+	estimated time to completion. Reports are throttled to one per interval,
+	so calling update after every matchup adds negligible overhead.
+
+	Each report is a dictionary passed to the callback and, if a path is
+	given, written to that file as one json line.
+
+	Parameters
+	----------
+	total: int
+		Number of units (e.g. matchups or evolutions) expected.
+	unit: str, optional
+		Name of the unit being counted. default: "matchups"
+	callback: function, optional
+		Called with every report. default: None
+	interval: float, optional
+		Minimum seconds between reports. default: 1.0
+	path: str, optional
+		File json lines are written to, overwriting any previous content.
+		default: None
+	"""
+
+	def __init__(self, total, unit="matchups", callback=None, interval=1.0,
+	             path=None):
+		self.total = total
+		self.unit = unit
+		self.callback = callback
+		self.interval = interval
+		self.stream = open(path, "w") if path else None
+
+		self.completed = 0
+		self.rounds = 0
+		self.start = time.monotonic()
+		self.last = self.start
+
+	def update(self, completed=1, rounds=0):
+		"""
+		Counts finished units and rounds, reporting if the interval passed.
+
+		Parameters
+		----------
+		completed: int, optional
+			Units finished since the last update. default: 1
+		rounds: int, optional
+			Dilemma rounds played since the last update. default: 0
+		"""
+		self.completed += completed
+		self.rounds += rounds
+
+		now = time.monotonic()
+		if now - self.last >= self.interval:
+			self.last = now
+			self.emit(now)
+		return self
+
+	def report(self, now=None, done=False):
+		"""
+		Returns the current progress report as a dictionary.
+		"""
+		if now is None:
+			now = time.monotonic()
+		elapsed = now - self.start
+		per_second = self.completed / elapsed if elapsed else 0.0
+
+		eta = None
+		if done:
+			eta = 0.0
+		elif per_second:
+			eta = max(self.total - self.completed, 0) / per_second
+
+		return {"unit": self.unit, "completed": self.completed,
+		        "total": self.total, "rounds": self.rounds,
+		        "elapsed": elapsed,
+		        "rounds_per_second": self.rounds / elapsed if elapsed else 0.0,
+		        f"{self.unit}_per_second": per_second, "eta": eta,
+		        "done": done}
+
+	def emit(self, now=None, done=False):
+		"""
+		Sends a report to the callback and stream.
+		"""
+		report = self.report(now, done)
+		if self.callback is not None:
+			self.callback(report)
+		if self.stream is not None:
+			self.stream.write(json.dumps(report) + "\n")
+			self.stream.flush()
+		return report
+
+	def finish(self):
+		"""
+		Sends a final report marked done and closes the file, if any.
+		"""
+		report = self.emit(done=True)
+		if self.stream is not None:
+			self.stream.close()
+			self.stream = None
+		return report
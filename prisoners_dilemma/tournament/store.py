@@ -0,0 +1,257 @@
+import sys
+import os
+import time
+import json
+import marshal
+import hashlib
+import inspect
+import sqlite3
+
+def function_code(func):
+	"""
+	Returns the source code of a function, or its bytecode when the source is
+	unavailable (e.g. defined interactively).
+	"""
+	try:
+		return inspect.getsource(func).encode()
+	except (OSError, TypeError):
+		return marshal.dumps(func.__code__)
+
+def referenced_names(code):
+	"""
+	Yields the global names used by a code object and any code nested in it,
+	such as inner functions, lambdas and comprehensions.
+	"""
+	yield from code.co_names
+	for const in code.co_consts:
+		if inspect.iscode(const):
+			yield from referenced_names(const)
+
+def global_code(value):
+	"""
+	Describes a module global a bot references: source code for functions and
+	classes, the module name for modules and the repr of anything else. Reprs
+	holding a memory address change every run, so the type name is used.
+	"""
+	if inspect.ismodule(value):
+		return f"module {value.__name__}".encode()
+	if inspect.isclass(value):
+		try:
+			return inspect.getsource(value).encode()
+		except (OSError, TypeError):
+			return f"class {value.__module__}.{value.__qualname__}".encode()
+	text = repr(value)
+	if " at 0x" in text:
+		text = f"instance of {type(value).__qualname__}"
+	return text.encode()
+
+def bot_hash(bot):
+	"""
+	Returns a hex digest identifying a player algorithm. The digest covers the
+	bot's name and source code plus the helpers and constants it references
+	from its module, followed through helper functions. Editing a bot or
+	anything it uses produces a new hash and invalidates every stored result
+	involving it, while other bots in the same script keep their hashes.
+	Returns None for external bots whose worker does not report code hashes.
+
+	Parameters
+	----------
+	bot: function
+		Player algorithm.
+	"""
+	digest = hashlib.sha256()
+	digest.update(f"{bot.__module__}.{bot.__name__}".encode())
+
+	if hasattr(bot, "pool"):
+		# External bots identify themselves through their worker
+		if bot.fingerprint is None:
+			return None
+		digest.update(bot.fingerprint.encode())
+		return digest.hexdigest()
+
+	# Walk the functions reachable through module globals
+	functions = [bot]
+	seen = {id(bot)}
+	while functions:
+		func = functions.pop()
+		digest.update(function_code(func))
+		for name in sorted(set(referenced_names(func.__code__))):
+			if name not in func.__globals__:
+				continue
+			value = func.__globals__[name]
+			digest.update(name.encode())
+			if inspect.isfunction(value):
+				if id(value) not in seen:
+					seen.add(id(value))
+					functions.append(value)
+				continue
+			digest.update(global_code(value))
+	return digest.hexdigest()
+
+class result_store():
+	"""
+	Persistent on-disk store of matchup results backed by sqlite. Each entry
+	holds the total score of both players for one matchup and is keyed by both
+	bot hashes, the n_rounds policy, the payoff matrix and the rng seed. Pairs
+	are stored in a canonical order so a lookup succeeds regardless of which
+	bot is listed first.
+
+	Parameters
+	----------
+	path: str
+		Location of the store file. Created if it does not exist.
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		directory = os.path.dirname(path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+
+		self.connection = sqlite3.connect(path)
+		self.connection.execute(
+			"CREATE TABLE IF NOT EXISTS results ("
+			"key TEXT PRIMARY KEY, hash_1 TEXT, hash_2 TEXT, "
+			"score_1 INTEGER, score_2 INTEGER, n_rounds INTEGER, "
+			"last_used REAL)")
+		self.connection.commit()
+
+	def key(self, hash_1, hash_2, policy):
+		"""
+		Builds the lookup key for an ordered pair of bot hashes. policy is a
+		json serializable description of n_rounds, payoffs and seed.
+		"""
+		raw = json.dumps([hash_1, hash_2, policy], sort_keys=True)
+		return hashlib.sha256(raw.encode()).hexdigest()
+
+	def get(self, hash_1, hash_2, policy):
+		"""
+		Returns (score_1, score_2, n_rounds) for the pair or None if the pair
+		has not been played under this policy.
+		"""
+		swapped = hash_1 > hash_2
+		if swapped:
+			hash_1, hash_2 = hash_2, hash_1
+
+		key = self.key(hash_1, hash_2, policy)
+		row = self.connection.execute(
+			"SELECT score_1, score_2, n_rounds FROM results WHERE key=?",
+			(key,)).fetchone()
+		if row is None:
+			return None
+
+		self.connection.execute("UPDATE results SET last_used=? WHERE key=?",
+		                        (time.time(), key))
+		if swapped:
+			return row[1], row[0], row[2]
+		return row
+
+	def put(self, hash_1, hash_2, policy, score_1, score_2, n_rounds):
+		"""
+		Stores the total scores of a single matchup.
+		"""
+		if hash_1 > hash_2:
+			hash_1, hash_2 = hash_2, hash_1
+			score_1, score_2 = score_2, score_1
+
+		self.connection.execute(
+			"INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+			(self.key(hash_1, hash_2, policy), hash_1, hash_2, int(score_1),
+			 int(score_2), int(n_rounds), time.time()))
+		return self
+
+	def gc(self, max_age=None, keep_hashes=None):
+		"""
+		Evicts stale entries and returns the number of entries removed.
+
+		Parameters
+		----------
+		max_age: float, optional
+			Removes entries not used within this many seconds. default: None
+		keep_hashes: iterable of str, optional
+			Removes entries involving any bot hash not in this collection.
+			Useful for dropping results of bots whose code changed or that
+			left the pool. default: None
+		"""
+		removed = 0
+		if max_age is not None:
+			cursor = self.connection.execute(
+				"DELETE FROM results WHERE last_used < ?",
+				(time.time() - max_age,))
+			removed += cursor.rowcount
+
+		if keep_hashes is not None:
+			keep_hashes = set(keep_hashes)
+			stale = [(key,) for key, hash_1, hash_2 in self.connection.execute(
+			         "SELECT key, hash_1, hash_2 FROM results")
+			         if hash_1 not in keep_hashes or hash_2 not in keep_hashes]
+			self.connection.executemany("DELETE FROM results WHERE key=?", stale)
+			removed += len(stale)
+
+		self.commit()
+		return removed
+
+	def commit(self):
+		"""
+		Flushes pending writes to disk.
+		"""
+		self.connection.commit()
+		return self
+
+	def close(self):
+		"""
+		Commits and closes the underlying database.
+		"""
+		self.connection.commit()
+		self.connection.close()
+		return self
+
+	def __len__(self):
+		return self.connection.execute(
+			"SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+# Code allowing command line usage is below this comment
+def store_gc():
+	"""
+	Intended for command line usage. Evicts stale entries from a result store.
+	Accepts store=PATH (required), max_age_days=FLOAT to drop entries unused
+	for that long and players=MYPLAYERS.py to drop entries for bots that are
+	no longer in the pool or whose code changed.
+	"""
+	from prisoners_dilemma.tournament.tournament import define_players
+
+	possible_args = ["store", "max_age_days", "players"]
+	given_args = sys.argv[1:]
+
+	kwargs = {}
+	for argv in given_args:
+		try:
+			key, value = argv.split('=', 1)
+		except ValueError as e:
+			message = (f"{argv} is not valid. Arguments must be "
+			            "'argument=value' with no whitespace.")
+			raise e from ValueError(message)
+
+		assert key in possible_args, (f"{key} is not a valid kwarg. kwargs must "
+		                               f"be one of:{possible_args}")
+		kwargs[key] = value
+
+	assert "store" in kwargs, "store=PATH must be given."
+
+	max_age = None
+	if "max_age_days" in kwargs:
+		max_age = float(kwargs["max_age_days"]) * 86400
+
+	keep_hashes = None
+	if "players" in kwargs:
+		players = kwargs["players"]
+		if players == "None":
+			players = None
+		keep_hashes = [bot_hash(bot) for bot in define_players(players)]
+
+	store = result_store(kwargs["store"])
+	removed = store.gc(max_age=max_age, keep_hashes=keep_hashes)
+	print(f"Removed {removed} entries, {len(store)} remaining.")
+	store.close()
+	return 0
@@ -1,9 +1,16 @@
 import sys
 import os
+import time
 import importlib
 import numpy as np
 from inspect import isfunction
 from prisoners_dilemma import bots
+from prisoners_dilemma.tournament.store import result_store, bot_hash
+from prisoners_dilemma.tournament.workers import external_players
+from prisoners_dilemma.tournament.budget import time_budget, BudgetExceeded
+from prisoners_dilemma.tournament.progress import progress_monitor
+from prisoners_dilemma.tournament.fingerprint import (equivalence_classes,
+	probe_sequences)
 
 def import_user_bots(filepath):
 	"""
@@ -86,20 +93,89 @@ class dilemma_tournament():
 		rng seed can be given for replicability. Note: this seed in not passed
 		to player algorithms. Player algorithm behavior may prevent perfect
 		replication. default: None
+	store: str, optional
+		Path of a persistent result store. When given, the tournament only
+		plays matchups missing from the store and rebuilds final_scores from
+		stored results. Each pair then draws its number of rounds from its own
+		rng stream derived from rng_seed and both bot hashes, so stored results
+		do not depend on the order pairs are played in. default: None
+	workers: str or list of str, optional
+		Commands starting external bot workers, e.g. 
+		"dilemma-worker players=mybots.py". Workers run in long-lived
+		processes and may be written in any language speaking the protocol in
+		prisoners_dilemma.tournament.workers. Decision requests from all
+		concurrent matches are batched into one message per worker each round.
+		Give a list for several commands. default: None
+	n_workers: int, optional
+		Number of processes started for each worker command. default: 1
+	decision_budget: float, optional
+		Maximum seconds a player algorithm may take for a single decision.
+		default: None
+	match_budget: float, optional
+		Maximum seconds a player algorithm may spend deciding over one match.
+		default: None
+	budget_policy: str, optional
+		What happens to a bot that overruns a budget. "forfeit" voids its
+		points for that match. "disqualify" also skips all its later matches.
+		default: "forfeit"
+	track_time: bool, optional
+		Records per bot CPU time and decisions per second even without
+		budgets. Budgets imply tracking. default: False
+	dedup: bool, optional
+		Fingerprints deterministic bots by their responses to a fixed set of
+		probe histories and groups identical bots into equivalence classes.
+		The tournament then plays each class against each class once and
+		credits the scores to every member. default: False
 	"""
+
+	# Gaussian used to draw the number of rounds when n_rounds is not given
+	round_mean = 200
+	round_sigma = 10
 	
-	def __init__(self, players=None, n_rounds=None, rng_seed=None):
+	def __init__(self, players=None, n_rounds=None, rng_seed=None, store=None,
+	             workers=None, n_workers=1, decision_budget=None,
+	             match_budget=None, budget_policy="forfeit", track_time=False,
+	             dedup=False):
 		# Player Algorithms
 		self.players = define_players(players)
 
+		# External player algorithms running in worker processes
+		self.pools = []
+		self.seats = 0
+		if workers:
+			self.pools, external_bots = external_players(workers, n_workers)
+			self.players.extend(external_bots)
+
 		# Number of rounds in each matchup
 		self.n_rounds = n_rounds
+		self.rng_seed = rng_seed
 		self.rng = np.random.default_rng(rng_seed)
 
+		# Persistent result store
+		self.store = store
+
+		# Decision timing and budgets
+		self.budget = None
+		if (track_time or decision_budget is not None or
+		    match_budget is not None):
+			self.budget = time_budget(decision_budget, match_budget,
+			                          budget_policy)
+
+		# Progress telemetry, set while a simulation runs
+		self.progress = None
+
+		# Behavioural equivalence classes, set by the tournament if dedup
+		self.dedup = dedup
+		self.classes = None
+
 		# Instance attirbutes for tracking wins/losses
 		self.all_results = []
 		self.readable_results = []
 		self.final_scores = {player.__name__: 0 for player in self.players}
+		self.last_scores = None
+
+		# [name_1, name_2, score_1, score_2] of every matchup credited
+		self.match_scores = []
 
 
 	def award_points(self, decision_1, decision_2):
@@ -131,12 +207,49 @@ class dilemma_tournament():
 		raise ValueError("Players must return Boolean where True==Cooperate")
 
 
-	def matchup(self, bot_1, bot_2):
+	def match_length(self, rng=None):
 		"""
-		This method runs some number of rounds of the prisoners dilemma by 
-		calling the award_points method n times. This method records all match 
-		information to all_results instance attribute, and awards points to the
-		final_score instance attribute.
+		Returns the number of rounds for a single matchup. Uses n_rounds if
+		defined, otherwise draws from a gaussian with a mean of round_mean and
+		standard deviation of round_sigma.
+
+		Parameters
+		----------
+		rng: numpy Generator, optional
+			Generator to draw from instead of the instance rng. default: None
+		"""
+		if self.n_rounds:
+			return self.n_rounds
+		return self.random_length(rng)
+
+	def random_length(self, rng=None):
+		"""
+		Draws a number of rounds from the gaussian with a mean of round_mean
+		and standard deviation of round_sigma, ignoring n_rounds.
+
+		Parameters
+		----------
+		rng: numpy Generator, optional
+			Generator to draw from instead of the instance rng. default: None
+		"""
+		if rng is None:
+			rng = self.rng
+		return round(rng.normal(self.round_mean, self.round_sigma))
+
+	def longest_length(self):
+		"""
+		Returns the longest match the n_rounds policy plays: n_rounds if set,
+		otherwise round_mean plus five round_sigma.
+		"""
+		if self.n_rounds:
+			return self.n_rounds
+		return self.round_mean + 5 * self.round_sigma
+
+	def play(self, bot_1, bot_2, nn):
+		"""
+		Plays nn rounds between two player algorithms without recording
+		anything on the instance. Returns both players' histories and total
+		scores as (bot_1_history, bot_2_history, score_1, score_2).
 
 		Parameters
 		----------
@@ -144,29 +257,38 @@ class dilemma_tournament():
 			Player algorithm.
 		bot_2: function
 			Player algorithm.
+		nn: int
+			Number of rounds to play.
 		"""
-    
-		# Initialize Matchup
-		nn = self.n_rounds
-		if not nn: # Random number of rounds if not user defined
-			nn = round(self.rng.normal(200, 10)) # Normal ditribution mean=200,
-			                                     # one_sigma=10
 		bot_1_history = []
 		bot_2_history = []
+		score_1 = 0
+		score_2 = 0
+
+		# Disqualified bots no longer play
+		if self.disqualified(bot_1, bot_2):
+			return bot_1_history, bot_2_history, score_1, score_2
+		spent_1 = [0.0]
+		spent_2 = [0.0]
 
 		# Run game nn times
 		for ii in range(nn):
 
-			# Collect bot decisions
-			decision_1 = bot_1(bot_2_history)
-			decision_2 = bot_2(bot_1_history)
+			# Collect bot decisions, offenders forfeit the match
+			try:
+				decision_1 = self.decide(bot_1, bot_2_history, spent_1)
+				decision_2 = self.decide(bot_2, bot_1_history, spent_2)
+			except BudgetExceeded as e:
+				if e.name == bot_1.__name__:
+					score_1 = 0
+				if e.name == bot_2.__name__:
+					score_2 = 0
+				break
 
 			# Run dilemma once, store score_tuple
 			score_tuple = self.award_points(decision_1, decision_2)
-
-			# Unpack score_tuple and update final scores
-			self.final_scores[bot_1.__name__] += score_tuple[0]
-			self.final_scores[bot_2.__name__] += score_tuple[1]
+			score_1 += score_tuple[0]
+			score_2 += score_tuple[1]
 
 			# Format each rounds results
 			round_info = [[bot_1.__name__, decision_1, score_tuple[0]],
@@ -176,13 +298,577 @@ class dilemma_tournament():
 			bot_1_history.append(round_info[0])
 			bot_2_history.append(round_info[1])
 
-		# Update object history with this rounds information
-		self.all_results.append([bot_1_history, bot_2_history])
+		# Count rounds for progress telemetry, reported on the next update
+		if self.progress is not None:
+			self.progress.rounds += len(bot_1_history)
+
+		return bot_1_history, bot_2_history, score_1, score_2
+
+	def decide(self, bot, opponent_history, spent):
+		"""
+		Returns a player algorithm's decision, timed and held to any budgets.
 
+		Parameters
+		----------
+		bot: function
+			Player algorithm.
+		opponent_history: list
+			History passed to the player algorithm.
+		spent: list of one float
+			Seconds the bot has spent deciding in this match. Updated in place.
+		"""
+		if self.budget is None:
+			return bot(opponent_history)
+		return self.budget.decide(bot, opponent_history, spent)
+
+	def disqualified(self, *bots):
+		"""
+		Returns True if any of the given player algorithms was disqualified for
+		overrunning its time budget.
+		"""
+		if self.budget is None:
+			return False
+		return any(bot.__name__ in self.budget.disqualified for bot in bots)
+
+	def budget_report(self, show=True):
+		"""
+		Returns per bot throughput statistics (decisions, CPU and wall-clock
+		time, decisions per second, violations, disqualification). Empty unless
+		budgets or track_time were given.
+
+		Parameters
+		----------
+		show: bool, optional
+			Prints the report as a table. default: True
+		"""
+		if self.budget is None:
+			return {}
+		return self.budget.report(show)
+
+	def matchup(self, bot_1, bot_2, nn=None):
+		"""
+		This method runs some number of rounds of the prisoners dilemma by 
+		calling the award_points method n times. This method records all match 
+		information to all_results instance attribute, and awards points to the
+		final_score instance attribute.
+
+		Parameters
+		----------
+		bot_1: function
+			Player algorithm.
+		bot_2: function
+			Player algorithm.
+		nn: int, optional
+			Number of rounds to play. By default, determined by match_length.
+		"""
+    
+		# Initialize Matchup
+		if not nn:
+			nn = self.match_length()
+
+		bot_1_history, bot_2_history, score_1, score_2 = self.play(bot_1, bot_2,
+		                                                           nn)
+		self.record(bot_1, bot_2, [bot_1_history, bot_2_history],
+		            (score_1, score_2))
+		return self
+
+	def record(self, bot_1, bot_2, history, score):
+		"""
+		Credits a finished matchup's scores and adds its histories to
+		all_results. Also keeps its scores in last_scores.
+
+		Parameters
+		----------
+		bot_1: function
+			Player algorithm.
+		bot_2: function
+			Player algorithm.
+		history: list
+			[bot_1_history, bot_2_history] of the matchup.
+		score: tuple
+			(score_1, score_2) of the matchup, after any forfeit.
+		"""
+		self.credit(bot_1.__name__, bot_2.__name__, score[0], score[1])
+		self.all_results.append(list(history))
+		self.last_scores = tuple(score)
+		return self
+
+	def credit(self, name_1, name_2, score_1, score_2):
+		"""
+		Adds one matchup's scores to final_scores and remembers them in
+		match_scores, so they can be voided later.
+		"""
+		self.final_scores[name_1] += score_1
+		self.final_scores[name_2] += score_2
+		self.match_scores.append([name_1, name_2, score_1, score_2])
 		return self
 
+	def void_disqualified(self):
+		"""
+		Voids every matchup involving a disqualified bot, including those
+		played before it was disqualified, for both players. Opponents then
+		fare the same whatever order the matchups were played in.
+		"""
+		if self.budget is None or not self.budget.disqualified:
+			return self
+		for match in self.match_scores:
+			name_1, name_2, score_1, score_2 = match
+			if (name_1 in self.budget.disqualified or
+			    name_2 in self.budget.disqualified):
+				self.final_scores[name_1] -= score_1
+				self.final_scores[name_2] -= score_2
+				match[2:] = [0, 0]
+		return self
+
+	def collect_decisions(self, requests):
+		"""
+		Gathers one decision for every request. In-process player algorithms
+		are called directly. Requests for external bots are batched into a
+		single message per worker pool and all pools answer in parallel.
+
+		Parameters
+		----------
+		requests: list of tuples
+			(bot, opponent_history, own_history, spent, seat) for every
+			decision needed, where spent is the bot's decision time in that
+			match and seat identifies the bot's side of the match.
+
+		A decision that overran its budget is returned as the BudgetExceeded
+		exception instead of a bool. With budgets, a worker that does not
+		answer in time is restarted and the requests it held are asked again
+		one at a time, so only the bot that hangs overruns.
+		"""
+		decisions = [None] * len(requests)
+		batches = {}
+		for ii, request in enumerate(requests):
+			bot, opponent_history, own_history, spent, seat = request
+			if hasattr(bot, "pool"):
+				request = bot.request(opponent_history, own_history, seat)
+				batches.setdefault(bot.pool, []).append((ii, request))
+				continue
+			try:
+				decisions[ii] = self.decide(bot, opponent_history, spent)
+			except BudgetExceeded as e:
+				decisions[ii] = e
+
+		start = time.perf_counter()
+		for pool, batch in batches.items():
+			pool.send([request for _, request in batch])
+		for pool, batch in batches.items():
+			answers = pool.receive(self.batch_timeout(requests, batch, start))
+
+			# Share the round trip evenly between the batch's requests
+			wall = (time.perf_counter() - start) / len(batch)
+			for (ii, _), decision in zip(batch, answers):
+				decisions[ii] = decision
+				if self.budget is None:
+					continue
+				bot, _, _, spent, _ = requests[ii]
+
+				# Requests left unanswered by a hung worker are asked again
+				if decision is None:
+					_, opponent_history, own_history, _, _ = requests[ii]
+					decisions[ii] = self.replay_decision(bot, opponent_history,
+					                                     own_history, spent)
+					continue
+				try:
+					self.budget.charge(bot.__name__, 0.0, wall, spent)
+				except BudgetExceeded as e:
+					decisions[ii] = e
+
+		return decisions
+
+	def replay_decision(self, bot, opponent_history, own_history, spent):
+		"""
+		Asks an external bot for one decision again, alone and with its full
+		history, after the batch it was part of went unanswered. Only this
+		request's time is charged. Returns the decision, or BudgetExceeded if
+		the bot misses its limit again.
+
+		Parameters
+		----------
+		bot: external_bot
+			Player algorithm hosted in a worker pool.
+		opponent_history: list
+			History passed to the player algorithm.
+		own_history: list
+			The bot's own history in the match.
+		spent: list of one float
+			Seconds the bot has spent deciding in this match. Updated in place.
+		"""
+		name = bot.__name__
+		start = time.perf_counter()
+		request = bot.request(opponent_history, own_history)
+		decision = bot.pool.decide([request], self.budget.limit(spent[0]))[0]
+		wall = time.perf_counter() - start
+
+		if decision is None:
+			self.budget.charge(name, 0.0, wall, spent, check=False)
+			self.budget.violation(name)
+			return BudgetExceeded(name, "decision")
+		try:
+			self.budget.charge(name, 0.0, wall, spent)
+		except BudgetExceeded as e:
+			return e
+		return decision
+
+	def batch_timeout(self, requests, batch, start):
+		"""
+		Returns the seconds left for a worker pool to answer a batch, or None
+		without budgets. Round trips are shared evenly between the batch's
+		requests, so the batch may take its tightest limit once per request.
+
+		Parameters
+		----------
+		requests: list of tuples
+			Requests passed to collect_decisions.
+		batch: list of tuples
+			(index, request) pairs sent to the pool.
+		start: float
+			time.perf_counter() when the batch was sent.
+		"""
+		if self.budget is None:
+			return None
+		limits = [self.budget.limit(requests[ii][3][0]) for ii, _ in batch]
+		limits = [limit for limit in limits if limit is not None]
+		if not limits:
+			return None
+		return start + min(limits) * len(batch) - time.perf_counter()
+
+	def batched_matchups(self, pairs):
+		"""
+		Plays many matchups in lockstep, one round of every match at a time, so
+		external bots receive all of a round's decision requests in one batch.
+		Records results like matchup and returns a list of (score_1, score_2).
+
+		Parameters
+		----------
+		pairs: list of tuples
+			(bot_1, bot_2, nn) for every matchup.
+		"""
+		histories = [([], []) for _ in pairs]
+		scores = [[0, 0] for _ in pairs]
+		spents = [([0.0], [0.0]) for _ in pairs]
+
+		# External bots keep match histories in their worker, one seat per side
+		first_seat = self.seats
+		self.seats += 2 * len(pairs)
+
+		# Matches end early when a bot forfeits or is disqualified
+		lengths = [0 if self.disqualified(bot_1, bot_2) else nn
+		           for bot_1, bot_2, nn in pairs]
+
+		# Matches skipped outright still count as completed
+		if self.progress is not None:
+			self.progress.update(lengths.count(0), 0)
+
+		for ii in range(max(lengths, default=0)):
+			active = [jj for jj, nn in enumerate(lengths) if nn > ii]
+
+			# Collect bot decisions for every active match
+			requests = []
+			for jj in active:
+				bot_1, bot_2, _ = pairs[jj]
+				bot_1_history, bot_2_history = histories[jj]
+				spent_1, spent_2 = spents[jj]
+				seat = first_seat + 2 * jj
+				requests.append((bot_1, bot_2_history, bot_1_history, spent_1,
+				                 seat))
+				requests.append((bot_2, bot_1_history, bot_2_history, spent_2,
+				                 seat + 1))
+			decisions = self.collect_decisions(requests)
+
+			for kk, jj in enumerate(active):
+				bot_1, bot_2, _ = pairs[jj]
+				decision_1 = decisions[2 * kk]
+				decision_2 = decisions[2 * kk + 1]
+
+				# Offenders forfeit the match
+				if isinstance(decision_1, BudgetExceeded):
+					scores[jj][0] = 0
+				if isinstance(decision_2, BudgetExceeded):
+					scores[jj][1] = 0
+				if (isinstance(decision_1, BudgetExceeded) or
+				    isinstance(decision_2, BudgetExceeded)):
+					lengths[jj] = ii
+					continue
+
+				# Run dilemma once, store score_tuple
+				score_tuple = self.award_points(decision_1, decision_2)
+				scores[jj][0] += score_tuple[0]
+				scores[jj][1] += score_tuple[1]
+
+				# Update this matches history
+				histories[jj][0].append([bot_1.__name__, decision_1,
+				                         score_tuple[0]])
+				histories[jj][1].append([bot_2.__name__, decision_2,
+				                         score_tuple[1]])
+
+			# Workers drop the histories of finished matches
+			finished = [jj for jj in active if lengths[jj] <= ii + 1]
+			for jj in finished:
+				for side, bot in enumerate(pairs[jj][:2]):
+					if hasattr(bot, "pool"):
+						bot.pool.forget(first_seat + 2 * jj + side)
+
+			if self.progress is not None:
+				self.progress.update(len(finished), len(active))
+
+		# Send end of match notices still queued
+		for pool in self.pools:
+			pool.flush()
+
+		# Update final scores and object history
+		for (bot_1, bot_2, _), history, score in zip(pairs, histories, scores):
+			self.record(bot_1, bot_2, history, score)
+
+		return [tuple(score) for score in scores]
+
+	def play_pairs(self, pairs):
+		"""
+		Plays a list of matchups and returns a list of (score_1, score_2).
+		Matchups are batched when external bots take part and played one at a
+		time with matchup otherwise.
+
+		Parameters
+		----------
+		pairs: list of tuples
+			(bot_1, bot_2, nn) for every matchup.
+		"""
+		if self.pools:
+			return self.batched_matchups(pairs)
+
+		scores = []
+		for bot_1, bot_2, nn in pairs:
+			scores.append(self.matchup(bot_1, bot_2, nn).last_scores)
+			if self.progress is not None:
+				self.progress.update(1)
+		return scores
+
+	def close(self):
+		"""
+		Shuts down any external bot workers.
+		"""
+		for pool in self.pools:
+			pool.close()
+		return self
+
+	def payoff_matrix(self):
+		"""
+		Plays every player algorithm against every player algorithm, including
+		itself, once and returns a k x k array of mean payoffs per round. Entry
+		[ii, jj] is the average points player ii earns per round against
+		player jj. Does not alter final_scores or all_results.
+		"""
+		k = len(self.players)
+		matrix = np.zeros((k, k))
+		for ii, bot_1 in enumerate(self.players):
+			for jj in range(ii, k):
+				nn = self.match_length()
+				_, _, score_1, score_2 = self.play(bot_1, self.players[jj], nn)
+				matrix[ii, jj] = score_1 / nn
+				matrix[jj, ii] = score_2 / nn
+		return matrix
+
+	def store_policy(self):
+		"""
+		Returns a json serializable description of everything besides the two
+		bots that determines a matchup result: the n_rounds policy, the payoff
+		matrix, the rng seed and the time budgets.
+		"""
+		n_rounds = self.n_rounds
+		if not n_rounds:
+			n_rounds = f"gaussian({self.round_mean}, {self.round_sigma})"
+
+		payoffs = [list(self.award_points(decision_1, decision_2))
+		           for decision_1 in (True, False)
+		           for decision_2 in (True, False)]
+		budget = None
+		if self.budget is not None:
+			budget = [self.budget.decision_budget, self.budget.match_budget,
+			          self.budget.policy]
+		return {"n_rounds": n_rounds, "payoffs": payoffs, "seed": self.rng_seed,
+		        "budget": budget}
+
+	def violated(self, bot):
+		"""
+		Returns True if a player algorithm overran its time budget at least
+		once, and so may have forfeited or been disqualified.
+		"""
+		if self.budget is None:
+			return False
+		return self.budget.stats.get(bot.__name__, [0, 0.0, 0.0, 0])[3] > 0
+
+	def stored_matchups(self, pairs):
+		"""
+		Plays a list of (bot_1, bot_2) pairs using the result store. Pairs
+		already in the store are looked up, missing pairs are played with
+		matchup and saved. final_scores is updated from both and a list of
+		(score_1, score_2) per pair is returned. Note: only newly played pairs
+		appear in all_results. Pairs involving a bot that overran its budget
+		are not saved, since their scores depend on timing. Pairs involving
+		an external bot without a code hash are always played and not saved.
+
+		Parameters
+		----------
+		pairs: list of tuples
+			(bot_1, bot_2) pairs of player algorithms.
+		"""
+		store = result_store(self.store)
+		policy = self.store_policy()
+		hashes = {bot.__name__: bot_hash(bot) for bot in self.players}
+
+		scores = [None] * len(pairs)
+		missing = []
+		for ii, (bot_1, bot_2) in enumerate(pairs):
+			hash_1 = hashes[bot_1.__name__]
+			hash_2 = hashes[bot_2.__name__]
+
+			# Bots without a code hash cannot be told apart from edited ones
+			if hash_1 is None or hash_2 is None:
+				missing.append((ii, (bot_1, bot_2, self.match_length())))
+				continue
+
+			stored = store.get(hash_1, hash_2, policy)
+			if stored is not None:
+				self.credit(bot_1.__name__, bot_2.__name__, stored[0], stored[1])
+				scores[ii] = (stored[0], stored[1])
+				if self.progress is not None:
+					self.progress.update(1, 0)
+				continue
+
+			# Seed a pair specific stream so results are order independent
+			pair_rng = np.random.default_rng(
+				[int(hash_, 16) for hash_ in sorted((hash_1, hash_2))]
+				+ ([] if self.rng_seed is None else [self.rng_seed]))
+			missing.append((ii, (bot_1, bot_2, self.match_length(pair_rng))))
+
+		played = self.play_pairs([pair for _, pair in missing])
+		for (ii, (bot_1, bot_2, nn)), score in zip(missing, played):
+			scores[ii] = score
+			hash_1 = hashes[bot_1.__name__]
+			hash_2 = hashes[bot_2.__name__]
+			if (hash_1 is None or hash_2 is None or self.violated(bot_1) or
+			    self.violated(bot_2)):
+				continue
+			store.put(hash_1, hash_2, policy, score[0], score[1], nn)
+
+		store.close()
+		return scores
+
+	def define_classes(self):
+		"""
+		Groups the player algorithms into behavioural equivalence classes and
+		stores them in the classes instance attribute. The long probes span
+		the longest match played, so bots that only change behaviour late in
+		a match are told apart. See prisoners_dilemma.tournament.fingerprint.
+		"""
+		decide = lambda bot, opponent_history: self.decide(bot,
+		                                                   opponent_history,
+		                                                   [0.0])
+		probes = probe_sequences(long_length=self.longest_length())
+		self.classes = equivalence_classes(self.players, self.award_points,
+		                                   probes, decide)
+		return self
+
+	def credit_classes(self, pairs, scores):
+		"""
+		Credits the scores of class representative matchups to every pair of
+		members. A member of class A earns its representative's score against
+		class B from every member of B, and its score against its own class
+		from every other member of A.
+
+		Parameters
+		----------
+		pairs: list of tuples
+			(class_1, class_2) index pairs that were played.
+		scores: list of tuples
+			(score_1, score_2) of every representative matchup.
+		"""
+		for (ii, jj), (score_1, score_2) in zip(pairs, scores):
+			class_1 = self.classes[ii]
+			class_2 = self.classes[jj]
+			if ii == jj:
+				for kk, bot_1 in enumerate(class_1):
+					for bot_2 in class_1[kk+1:]:
+						self.credit(bot_1.__name__, bot_2.__name__, score_1,
+						            score_1)
+				continue
+			for bot_1 in class_1:
+				for bot_2 in class_2:
+					self.credit(bot_1.__name__, bot_2.__name__, score_1, score_2)
+		return self
+
+	def round_sweep(self, n_rounds_sweep, show_scores=True):
+		"""
+		Scores the tournament for several match lengths in a single pass. A
+		bot's decision in round t only depends on the first t rounds, so one
+		match of the longest length contains every shorter match as a prefix.
+		Each pair is played once at the longest length and cumulative per
+		round scores give every bot's total for each length. Returns a
+		(lengths x players) array, also stored in sweep_scores, with row labels
+		in sweep_lengths and columns in players order. final_scores holds the
+		totals at the longest length.
+
+		Parameters
+		----------
+		n_rounds_sweep: list of ints
+			Match lengths to score. None stands for the gaussian n_rounds
+			policy: each pair's end point is drawn from the gaussian and read
+			off the prefix, capped at round_mean + 5 * round_sigma.
+		show_scores: bool, optional
+			Prints the score table. default: True
+		"""
+		lengths = list(n_rounds_sweep)
+		fixed = [length for length in lengths if length is not None]
+		longest = max(fixed, default=0)
+		if None in lengths:
+			longest = max(longest, self.round_mean + 5 * self.round_sigma)
+
+		# Play every pair once at the longest length
+		pairs = [(bot_1, bot_2, longest) for ii, bot_1 in enumerate(self.players)
+		         for bot_2 in self.players[ii+1:]]
+		scores = self.play_pairs(pairs)
+		histories = self.all_results[len(self.all_results) - len(pairs):]
+
+		columns = {bot.__name__: ii for ii, bot in enumerate(self.players)}
+		table = np.zeros((len(lengths), len(self.players)))
+		for (bot_1, bot_2, _), history, score in zip(pairs, histories, scores):
+
+			# Both bots of a match share its end point
+			ends = [min(max(self.random_length(), 0), longest)
+			        if length is None else length for length in lengths]
+
+			# Disqualified bots forfeit every matchup, whenever it was played
+			if self.disqualified(bot_1, bot_2):
+				continue
+
+			for side, bot in enumerate((bot_1, bot_2)):
+
+				# Cumulative score after every round, padded past a forfeit
+				cumulative = np.full(longest + 1, score[side], dtype=float)
+				points = [entry[2] for entry in history[side]]
+				cumulative[0] = 0
+				cumulative[1:len(points) + 1] = np.cumsum(points)
+
+				for row, end in enumerate(ends):
+					table[row, columns[bot.__name__]] += cumulative[end]
+
+		self.sweep_lengths = ["gaussian" if length is None else length
+		                      for length in lengths]
+		self.sweep_scores = table
+
+		if show_scores:
+			print("\nScores by n_rounds\n------------------------------")
+			for label, row in zip(self.sweep_lengths, table):
+				print(f"n_rounds={label}")
+				for bot, score in zip(columns, row):
+					print(f"  {bot}: {score:g}")
+		return table
+
 	def tournament(self, show_scores=True, return_all_results=False, 
-				   return_scores=False):
+				   return_scores=False, progress=None, progress_interval=1.0,
+				   progress_file=None, n_rounds_sweep=None):
 		"""
 		This method tests every player algorithm against each other. Each
 		player algorithm will play one "match" with each other player algorithm
@@ -200,12 +886,63 @@ class dilemma_tournament():
 		return_scores: bool
 			Returns final scores instead of self. Note: if True, does not 
 			return self and other methods cannot be chained. default: False
+		progress: function, optional
+			Called with a progress report dictionary (matchups completed out
+			of total, rounds per second, matchups per second, eta in seconds)
+			at most once per progress_interval. default: None
+		progress_interval: float, optional
+			Minimum seconds between progress reports. default: 1.0
+		progress_file: str, optional
+			Path of a json lines file progress reports are written to.
+			default: None
+		n_rounds_sweep: list of ints, optional
+			Scores several match lengths in one pass with round_sweep and
+			returns the (lengths x players) table instead of self. Note: the
+			store and dedup options do not apply to sweeps. default: None
 		"""
+		# Pair up every bot, or one representative per equivalence class
+		if self.dedup and n_rounds_sweep is None:
+			self.define_classes()
+			class_pairs = [(ii, jj) for ii in range(len(self.classes))
+			               for jj in range(ii, len(self.classes))
+			               if ii != jj or len(self.classes[ii]) > 1]
+			pairs = [(self.classes[ii][0], self.classes[jj][0])
+			         for ii, jj in class_pairs]
+			before = dict(self.final_scores)
+			n_matches = len(self.match_scores)
+		else:
+			pairs = [(bot_1, bot_2) for ii, bot_1 in enumerate(self.players)
+			         for bot_2 in self.players[ii+1:]]
+
+		# Start progress telemetry
+		if progress is not None or progress_file is not None:
+			self.progress = progress_monitor(len(pairs), "matchups", progress,
+			                                 progress_interval, progress_file)
 
 		# Loops through bots, testing against all other bots
-		for ii, bot_1 in enumerate(self.players):
-			for bot_2 in self.players[ii+1:]:
-				self.all_results.append(self.matchup(bot_1, bot_2))
+		if n_rounds_sweep is not None:
+			table = self.round_sweep(n_rounds_sweep, show_scores)
+		elif self.store:
+			scores = self.stored_matchups(pairs)
+		else:
+			scores = self.play_pairs([(bot_1, bot_2, self.match_length())
+			                          for bot_1, bot_2 in pairs])
+
+		# Replace representative scores with scores for every member
+		if self.dedup and n_rounds_sweep is None:
+			self.final_scores = before
+			del self.match_scores[n_matches:]
+			self.credit_classes(class_pairs, scores)
+
+		# Disqualified bots forfeit every matchup, whenever it was played
+		self.void_disqualified()
+
+		if self.progress is not None:
+			self.progress.finish()
+			self.progress = None
+
+		if n_rounds_sweep is not None:
+			return table
 
 		# Calculate Benchmark scores
 		if not self.n_rounds:
@@ -228,6 +965,8 @@ class dilemma_tournament():
 			print("\n" + benchmarks)
 			for bot, score in self.final_scores.items():
 				print(f"{bot}: {score}")
+			if self.budget is not None:
+				self.budget_report()
 		if return_all_results:
 			return self.all_results
 		if return_scores:
@@ -243,11 +982,17 @@ def tournament():
 	Intended for command line usage. Parses sys.argv list into kwargs. Then,
 	runs full tournament simulation and print results and benchmarks in
 	command line. For possible kwargs, see dilemma_tournament class and its 
-	tournament() method.
+	tournament() method. workers may be given several times, once per worker
+	command.
 	"""
 	# Possible arguments
-	possible_args = ["players", "n_rounds", "rng_seed"]
+	possible_args = ["players", "n_rounds", "rng_seed", "store", "workers",
+	                 "n_workers", "decision_budget", "match_budget",
+	                 "budget_policy", "track_time", "dedup"]
+	str_args = ["players", "store", "budget_policy"]
+	float_args = ["decision_budget", "match_budget"]
 	tourni_args = ["show_scores", "return_scores", "return_all_results"]
+	progress_args = ["progress_file", "progress_interval", "n_rounds_sweep"]
 	given_args = sys.argv[1:]
 
 	kwargs = {}
@@ -256,12 +1001,22 @@ def tournament():
 	# Store arguments as kwargs
 	for argv in given_args:
 		try:
-			key, value = argv.split('=')
+			key, value = argv.split('=', 1)
 		except ValueError as e:
 			message = (f"{argv} is not valid. Arguments must be "
 			            "'argument=value' with no whitespace.")
 			raise e from ValueError(message)
 
+		# Handle progress telemetry kwargs
+		if key in progress_args:
+			if key == "progress_interval":
+				value = float(value)
+			if key == "n_rounds_sweep":
+				value = [None if v == "None" else int(v)
+				         for v in value.split(",")]
+			twargs[key] = value
+			continue
+
 		# Handle Tournament kwargs
 		if key in tourni_args:
 			if value == "False":
@@ -275,20 +1030,34 @@ def tournament():
 
 		try:
 
-			# All arguments other that players are integers
-			if key != "players":
+			# Integer arguments
+			if key not in str_args + float_args + ["track_time", "dedup",
+			                                       "workers"]:
 				kwargs[key] = int(value)
 
-			# Parse player script
-			if key == "players":
+			# Time budgets in seconds
+			if key in float_args:
+				kwargs[key] = float(value)
+
+			if key in ["track_time", "dedup"]:
+				kwargs[key] = value != "False"
+
+			# Parse player script, store path and policy
+			if key in str_args:
 				kwargs[key] = value
+
+			# Repeatable, one worker command each
+			if key == "workers":
+				kwargs.setdefault(key, []).append(value)
 			
 		except ValueError as e:
 			message = (f"Invalid value for {key}={value}. "
 						"this kwarg must be an integers.")
 			raise e from ValueError(message)
 
-	dilemma_tournament(**kwargs).tournament(**twargs)
+	game = dilemma_tournament(**kwargs)
+	game.tournament(**twargs)
+	game.close()
 	return 0
 
 
@@ -0,0 +1,354 @@
+import os
+import sys
+import json
+import time
+import shlex
+import atexit
+import select
+import subprocess
+from inspect import isfunction
+
+# Protocol spoken by external bot workers over stdin/stdout, one message per
+# line:
+#
+# 1. On start, the worker writes a hello line listing the bots it hosts and,
+#    optionally, a hash of each bot's code:
+#    {"bots": ["bot_a", "bot_b"], "hashes": {"bot_a": "...", "bot_b": "..."}}
+#    The hash must change whenever the bot's behaviour may change. Results
+#    of bots without a hash are never kept in a result store.
+# 2. The engine writes a batch of decision requests as a json list. Each
+#    request is [seat, bot, opponent, own_moves, opponent_moves]. seat is an
+#    integer identifying one bot's side of one match. Moves are strings of
+#    "C" (cooperate) and "D" (defect), oldest first, holding only the moves
+#    played since the seat's previous request to this worker: empty on the
+#    first round and one character each afterwards. The worker keeps every
+#    seat's history. A restarted worker is sent each seat's full history.
+#    A null seat carries the full history and is not remembered.
+# 3. A request of just [seat] means the seat's match is over and its history
+#    can be dropped. It gets no answer.
+# 4. The worker answers with a single line of "C"/"D" characters, one per
+#    decision request, in request order.
+# 5. The engine closes stdin to shut the worker down.
+#
+# Any executable speaking this protocol can take part, regardless of language.
+
+def encode_moves(history):
+	"""
+	Encodes the decisions in a bot history as a string of "C" and "D".
+	"""
+	return "".join("C" if entry[1] else "D" for entry in history)
+
+class worker_pool():
+	"""
+	A pool of long-lived worker processes all running the same command. Every
+	worker hosts the same bots, so a batch of decision requests is split
+	across the pool and answered in parallel. Requests for a seat always go to
+	the same worker, which keeps that seat's history.
+
+	Parameters
+	----------
+	command: str
+		Command starting one worker, e.g. "dilemma-worker players=mybots.py".
+	n_workers: int, optional
+		Number of worker processes to start. default: 1
+	"""
+
+	def __init__(self, command, n_workers=1):
+		self.command = command
+		self.processes = [self.start() for ii in range(n_workers)]
+		self.pending = []
+		self.n_requests = 0
+		self.finished = []
+		atexit.register(self.close)
+
+		# Seats each worker holds a history for, and seats whose worker was
+		# restarted and must be sent their full history again
+		self.seated = [set() for _ in self.processes]
+		self.resync = set()
+
+		# Every worker announces its bots on start
+		hellos = [json.loads(process.stdout.readline())
+		          for process in self.processes]
+		self.bots = hellos[0]["bots"]
+		self.hashes = hellos[0].get("hashes", {})
+		for hello in hellos[1:]:
+			self.check_hello(hello)
+
+	def start(self):
+		"""
+		Starts one worker process.
+		"""
+		return subprocess.Popen(shlex.split(self.command), stdin=subprocess.PIPE,
+		                        stdout=subprocess.PIPE, text=True, bufsize=1)
+
+	def restart(self, process):
+		"""
+		Kills an unresponsive worker and replaces it with a fresh one. The
+		seats it held are sent their full history with their next request.
+		"""
+		process.kill()
+		process.wait()
+		index = self.processes.index(process)
+		self.processes[index] = self.start()
+		self.resync |= self.seated[index]
+		self.seated[index] = set()
+		self.check_hello(json.loads(self.processes[index].stdout.readline()))
+		return self
+
+	def check_hello(self, hello):
+		"""
+		Raises ValueError unless a worker hosts the same bots, with the same
+		code, as the first worker of the pool.
+		"""
+		if (hello["bots"] != self.bots or
+		    hello.get("hashes", {}) != self.hashes):
+			raise ValueError(f"Workers of '{self.command}' host different bots.")
+		return self
+
+	def worker_for(self, seat, position):
+		"""
+		Returns the index of the worker handling a request. Seated requests
+		stick to one worker, unseated ones are spread by position.
+		"""
+		key = position if seat is None else seat
+		return key % len(self.processes)
+
+	def forget(self, seat):
+		"""
+		Queues an end of match notice for a seat, sent with the next batch.
+		"""
+		self.finished.append(seat)
+		return self
+
+	def send(self, requests):
+		"""
+		Splits a batch of decision requests across the workers and writes one
+		message to each worker with requests or queued end of match notices.
+		Answers are collected with receive.
+
+		Parameters
+		----------
+		requests: list
+			[seat, bot, opponent, own_moves, opponent_moves] decision requests.
+		"""
+		chunks = [[] for _ in self.processes]
+		positions = [[] for _ in self.processes]
+		for seat in self.finished:
+			index = self.worker_for(seat, 0)
+			chunks[index].append([seat])
+			self.seated[index].discard(seat)
+			self.resync.discard(seat)
+		for ii, request in enumerate(requests):
+			index = self.worker_for(request[0], ii)
+			chunks[index].append(request)
+			positions[index].append(ii)
+			if request[0] is not None:
+				self.seated[index].add(request[0])
+		self.finished = []
+
+		self.pending = []
+		self.n_requests = len(requests)
+		for process, chunk, indices in zip(self.processes, chunks, positions):
+			if not chunk:
+				continue
+			process.stdin.write(json.dumps(chunk, separators=(",", ":")) + "\n")
+			process.stdin.flush()
+			self.pending.append((process, indices))
+		return self
+
+	def receive(self, timeout=None):
+		"""
+		Reads the answers to the last batch sent and returns them, in request
+		order, as a list of bools where True indicates Cooperation.
+
+		Parameters
+		----------
+		timeout: float, optional
+			Seconds to wait for every worker to answer. Workers that miss the
+			deadline are restarted and their requests are answered with None.
+			Only enforced on POSIX systems. default: None
+		"""
+		deadline = None
+		if timeout is not None and os.name == "posix":
+			deadline = time.perf_counter() + timeout
+
+		decisions = [None] * self.n_requests
+		for process, indices in self.pending:
+			if deadline is not None:
+				remaining = max(deadline - time.perf_counter(), 0)
+				ready, _, _ = select.select([process.stdout], [], [], remaining)
+				if not ready:
+					self.restart(process)
+					continue
+			answer = process.stdout.readline().strip()
+			if len(answer) != len(indices):
+				raise ValueError(f"Worker '{self.command}' answered {len(answer)}"
+				                 f" of {len(indices)} requests.")
+			for ii, move in zip(indices, answer):
+				decisions[ii] = move == "C"
+		self.pending = []
+		return decisions
+
+	def flush(self):
+		"""
+		Sends any queued end of match notices.
+		"""
+		if self.finished:
+			self.send([]).receive()
+		return self
+
+	def decide(self, requests, timeout=None):
+		"""
+		Sends a batch of decision requests and waits for the answers. See
+		receive for timeout.
+		"""
+		return self.send(requests).receive(timeout)
+
+	def close(self):
+		"""
+		Shuts every worker down.
+		"""
+		for process in self.processes:
+			if process.poll() is None:
+				process.stdin.close()
+				process.wait()
+		return self
+
+class external_bot():
+	"""
+	Stands in for a player algorithm hosted in a worker pool. Calling it with
+	an opponent history, like any player algorithm, costs one round trip.
+	dilemma_tournament batches requests from many concurrent matches instead
+	when external bots take part.
+
+	Parameters
+	----------
+	name: str
+		Name of the bot inside the worker.
+	pool: worker_pool
+		Pool hosting the bot.
+	"""
+
+	def __init__(self, name, pool):
+		self.__name__ = name
+		self.pool = pool
+		# Used by bot_hash in place of source code, None if the worker does
+		# not report a code hash
+		self.fingerprint = None
+		if name in pool.hashes:
+			self.fingerprint = f"{pool.command}::{name}::{pool.hashes[name]}"
+
+	def request(self, opponent_moves, own_moves=None, seat=None):
+		"""
+		Builds the decision request for an opponent history. With a seat only
+		the latest round is sent, otherwise the full history. Own moves are
+		recovered from the opponent's points when not given.
+
+		Parameters
+		----------
+		opponent_moves: list
+			Opponent history, as passed to player algorithms.
+		own_moves: list, optional
+			This bot's history in the match. default: None
+		seat: int, optional
+			Identifies this bot's side of the match. default: None
+		"""
+		opponent = opponent_moves[0][0] if opponent_moves else ""
+		if seat in self.pool.resync:
+			# The seat's worker was restarted and lost its history
+			self.pool.resync.discard(seat)
+		elif seat is not None:
+			opponent_moves = opponent_moves[-1:]
+			own_moves = own_moves[-1:]
+
+		if own_moves is None:
+			# Opponent scores 2 or 3 only when this bot cooperated
+			own_moves = "".join("C" if entry[2] in (2, 3) else "D"
+			                    for entry in opponent_moves)
+		else:
+			own_moves = encode_moves(own_moves)
+		return [seat, self.__name__, opponent, own_moves,
+		        encode_moves(opponent_moves)]
+
+	def __call__(self, opponent_moves):
+		return self.pool.decide([self.request(opponent_moves)])[0]
+
+def external_players(commands, n_workers=1):
+	"""
+	Starts a worker pool for every command and returns (pools, bots) where
+	bots is a list of external_bot proxies for every bot the pools host.
+
+	Parameters
+	----------
+	commands: str or list of str
+		Worker command, or a list of worker commands. Commands are never
+		split, so they may contain any shell syntax shlex accepts.
+	n_workers: int, optional
+		Number of worker processes per command. default: 1
+	"""
+	if isinstance(commands, str):
+		commands = [commands]
+
+	pools = [worker_pool(command, n_workers) for command in commands]
+	bots = [external_bot(name, pool) for pool in pools for name in pool.bots]
+	return pools, bots
+
+
+# Code allowing command line usage is below this comment
+def serve(players, stdin=None, stdout=None):
+	"""
+	Runs a worker hosting the player algorithms of a python script. Speaks the
+	worker protocol over stdin/stdout until stdin closes.
+
+	Parameters
+	----------
+	players: str
+		Path of the python script defining player functions.
+	"""
+	from prisoners_dilemma.tournament.tournament import (import_user_bots,
+	                                                      dilemma_tournament)
+	from prisoners_dilemma.tournament.store import bot_hash
+	stdin = stdin or sys.stdin
+	stdout = stdout or sys.stdout
+
+	module = import_user_bots(players)
+	bots = {item: getattr(module, item) for item in dir(module)
+	        if isfunction(getattr(module, item))}
+	# award_points does not use instance state
+	award_points = dilemma_tournament.award_points
+
+	hashes = {name: bot_hash(bot) for name, bot in bots.items()}
+	stdout.write(json.dumps({"bots": sorted(bots), "hashes": hashes}) + "\n")
+	stdout.flush()
+
+	# seat -> opponent history player algorithms expect
+	histories = {}
+	for line in stdin:
+		answer = []
+		for request in json.loads(line):
+
+			# End of match notice
+			if len(request) == 1:
+				histories.pop(request[0], None)
+				continue
+
+			# Extend the seat's history with the latest moves
+			seat, name, opponent, own_moves, opponent_moves = request
+			history = [] if seat is None else histories.setdefault(seat, [])
+			for own, other in zip(own_moves, opponent_moves):
+				points = award_points(None, own == "C", other == "C")[1]
+				history.append([opponent, other == "C", points])
+
+			answer.append("C" if bots[name](history) else "D")
+
+		stdout.write("".join(answer) + "\n")
+		stdout.flush()
+	return 0
+
+def worker():
+	"""
+	Intended for command line usage. Starts a worker for players=MYPLAYERS.py.
+	"""
+	kwargs = dict(argv.split('=', 1) for argv in sys.argv[1:])
+	assert "players" in kwargs, "players=MYPLAYERS.py must be given."
+	return serve(kwargs["players"])
@@ -18,7 +18,10 @@ setuptools.setup(
           "console_scripts" : [
                "dilemma-tournament = prisoners_dilemma.tournament:tournament",
                "dilemma-population = prisoners_dilemma.population:population",
-               "dilemma-credits = prisoners_dilemma.tournament:credits"
+               "dilemma-sweep = prisoners_dilemma.population:sweep",
+               "dilemma-credits = prisoners_dilemma.tournament:credits",
+               "dilemma-store-gc = prisoners_dilemma.tournament:store_gc",
+               "dilemma-worker = prisoners_dilemma.tournament:worker"
           ]
      }
 )
\ No newline at end of file